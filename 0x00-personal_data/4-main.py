@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Main file: redaction throughput of filter_datum against the
+precompiled Redactor, in lines/sec
+"""
+import re
+import timeit
+
+Redactor = __import__('filtered_logger').Redactor
+
+
+def legacy_filter_datum(fields, redaction, message, separator):
+    """ filter_datum as it was before the Redactor """
+    for field in fields:
+        message = re.sub(f"{field}=.*?{separator}",
+                         f"{field}={redaction}{separator}", message)
+    return message
+
+
+def build_record(fields, size):
+    """ Build a key=value; record of roughly `size` bytes """
+    pairs = []
+    length = 0
+    i = 0
+    while length < size:
+        pair = "{}=value{};".format(fields[i % len(fields)], i)
+        pairs.append(pair)
+        length += len(pair)
+        i += 1
+    return "".join(pairs)
+
+
+PII_FIELDS = __import__('filtered_logger').PII_FIELDS
+
+for fields in [list(PII_FIELDS)] + [["field{}".format(i) for i in range(n)]
+                                    for n in (50, 500)]:
+    n_fields = len(fields)
+    redactor = Redactor(fields, "***", ";")
+    for size in (256, 1024, 64 * 1024):
+        record = build_record(fields + ["other"], size)
+        assert redactor(record) == legacy_filter_datum(fields, "***",
+                                                       record, ";")
+        number = max(1, 200000 // (n_fields * size // 64 or 1))
+        old = timeit.timeit(lambda: legacy_filter_datum(fields, "***",
+                                                        record, ";"),
+                            number=number)
+        new = timeit.timeit(lambda: redactor(record), number=number)
+        print("{:>3} fields {:>6} B: legacy {:>10.0f} lines/s, "
+              "redactor {:>10.0f} lines/s".format(n_fields, size,
+                                                  number / old,
+                                                  number / new))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Main file: cost of opening a fresh connection per job against
+checking one out of a ConnectionPool, offline on SQLite
+"""
+import sqlite3
+import time
+import timeit
+
+ConnectionPool = __import__('connection_pool').ConnectionPool
+
+HANDSHAKE = 0.002
+
+
+def connect():
+    """ SQLite stand-in for mysql.connector.connect, sleeping to
+        simulate the TCP and authentication handshake """
+    time.sleep(HANDSHAKE)
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+def job(db):
+    """ A tiny reporting job """
+    cursor = db.cursor()
+    cursor.execute("SELECT 1")
+    cursor.fetchall()
+    cursor.close()
+    db.close()
+
+
+pool = ConnectionPool(connect, size=4, idle_timeout=60)
+number = 500
+fresh = timeit.timeit(lambda: job(connect()), number=number)
+pooled = timeit.timeit(lambda: job(pool.acquire()), number=number)
+print("fresh connection: {:.0f} jobs/s".format(number / fresh))
+print("pooled connection: {:.0f} jobs/s".format(number / pooled))
+print("created: {} reused: {} evicted: {}".format(pool.created,
+                                                  pool.reused,
+                                                  pool.evicted))
+
+pool.idle_timeout = 0.01
+db = pool.acquire()
+db.close()
+time.sleep(0.02)
+job(pool.acquire())
+print("after idle timeout, evicted: {}".format(pool.evicted))
+pool.close()
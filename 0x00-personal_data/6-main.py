@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Main file: latency a log call adds to the caller, with a
+synchronous StreamHandler and with the queue-backed pipeline
+"""
+import logging
+import os
+import time
+
+filtered_logger = __import__('filtered_logger')
+RedactingFormatter = filtered_logger.RedactingFormatter
+PII_FIELDS = filtered_logger.PII_FIELDS
+
+message = "name=Bob;email=bob@dylan.com;ssn=000-123-0000;password=bobby2019;" \
+    "ip=192.168.0.1;user_agent=Mozilla/5.0;" * 4
+calls = 20000
+
+
+def percentiles(logger):
+    """ Return p50 and p99 of a logger.info call, in microseconds """
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        logger.info(message)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return (samples[len(samples) // 2] * 1e6,
+            samples[int(len(samples) * 0.99)] * 1e6)
+
+
+with open(os.devnull, "w") as devnull:
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
+
+    sync_logger = logging.getLogger("sync_user_data")
+    sync_logger.propagate = False
+    sync_logger.setLevel(logging.INFO)
+    sync_logger.addHandler(handler)
+    print("sync:  p50 {:.1f}us p99 {:.1f}us".format(
+        *percentiles(sync_logger)))
+
+    queue_logger = logging.getLogger("queue_user_data")
+    queue_logger.propagate = False
+    queue_logger.setLevel(logging.INFO)
+    listener = filtered_logger.attach_queue_handler(queue_logger, handler,
+                                                    queue_size=calls)
+    print("queue: p50 {:.1f}us p99 {:.1f}us".format(
+        *percentiles(queue_logger)))
+    listener.stop()
+
+logger = filtered_logger.get_logger()
+assert logger is filtered_logger.get_logger()
+print("handlers after two get_logger calls: {}".format(len(logger.handlers)))
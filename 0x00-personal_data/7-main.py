@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Main file: bcrypt throughput inline against the HashingService
+"""
+import asyncio
+import time
+from concurrent.futures import wait
+
+import bcrypt
+HashingService = __import__('hashing_service').HashingService
+
+passwords = ["MyAmazingPassw0rd{}".format(i) for i in range(32)]
+
+start = time.perf_counter()
+for password in passwords:
+    bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+inline = time.perf_counter() - start
+print("inline: {:.1f} hashes/s".format(len(passwords) / inline))
+
+service = HashingService()
+start = time.perf_counter()
+futures = [service.submit_hash(password) for password in passwords]
+wait(futures)
+pooled = time.perf_counter() - start
+print("service ({} workers): {:.1f} hashes/s".format(
+    service.workers, len(passwords) / pooled))
+
+hashed = futures[0].result()
+print(service.is_valid(hashed, passwords[0]))
+
+
+async def check_all():
+    """ Verify every password concurrently from a coroutine """
+    return await asyncio.gather(*(
+        service.is_valid_async(future.result(), password)
+        for future, password in zip(futures, passwords)))
+
+print(all(asyncio.run(check_all())))
+service.shutdown()
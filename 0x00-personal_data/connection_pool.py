@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+""" Connection Pool Model """
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+
+class PoolExhausted(Exception):
+    """ Raised when no connection could be checked out in time """
+
+
+def default_health_check(connection: Any) -> bool:
+    """ Return True if the connection still answers a trivial query """
+    try:
+        is_connected = getattr(connection, "is_connected", None)
+        if is_connected is not None:
+            return is_connected()
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+def default_reset(connection: Any) -> bool:
+    """ Roll back whatever the last user left open, unread results
+        included; return False if the connection can't be reused """
+    try:
+        connection.rollback()
+        return True
+    except Exception:
+        return False
+
+
+class PooledConnection:
+    """ Proxy around a pooled connection: close() hands the
+        connection back to its pool instead of closing the socket """
+
+    def __init__(self, pool: "ConnectionPool", connection: Any):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name: str) -> Any:
+        if self._connection is None:
+            raise AttributeError("connection was returned to the pool")
+        return getattr(self._connection, name)
+
+    def close(self) -> None:
+        """ Return the connection to the pool """
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """ Bounded pool of database connections
+
+        `connect` is a zero argument factory returning a new DB-API
+        connection. Connections are reset on release, health checked on
+        checkout and closed once they stayed idle longer than
+        `idle_timeout` seconds. A checkout waits at most
+        `checkout_timeout` seconds for a free connection (forever if
+        None) before raising PoolExhausted. """
+
+    def __init__(self, connect: Callable[[], Any], size: int = 5,
+                 idle_timeout: float = 300.0,
+                 health_check: Callable[[Any], bool] = default_health_check,
+                 checkout_timeout: float = 30.0,
+                 reset: Callable[[Any], bool] = default_reset):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.connect = connect
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.checkout_timeout = checkout_timeout
+        self.reset = reset
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def _evict_idle(self, now: float) -> list:
+        """ Pop the connections idle for longer than idle_timeout,
+            oldest first; must be called with the lock held """
+        stale = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            stale.append(self._idle.popleft()[0])
+        self.evicted += len(stale)
+        return stale
+
+    def acquire(self) -> PooledConnection:
+        """ Check out a healthy connection, creating one if needed """
+        if self.checkout_timeout is None:
+            acquired = self._slots.acquire()
+        else:
+            acquired = self._slots.acquire(timeout=self.checkout_timeout)
+        if not acquired:
+            raise PoolExhausted("no connection available in the pool")
+
+        try:
+            while True:
+                with self._lock:
+                    stale = self._evict_idle(time.monotonic())
+                    connection = self._idle.pop()[0] if self._idle else None
+                _close_all(stale)
+                if connection is None:
+                    connection = self.connect()
+                    self.created += 1
+                    break
+                if self.health_check(connection):
+                    self.reused += 1
+                    break
+                self.evicted += 1
+                _close_all([connection])
+        except BaseException:
+            self._slots.release()
+            raise
+        return PooledConnection(self, connection)
+
+    def release(self, connection: Any) -> None:
+        """ Give a checked out connection back to the pool, or close it
+            if it could not be reset """
+        if not self.reset(connection):
+            with self._lock:
+                self.evicted += 1
+            _close_all([connection])
+            self._slots.release()
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._idle.append((connection, now))
+            stale = self._evict_idle(now)
+        _close_all(stale)
+        self._slots.release()
+
+    def close(self) -> None:
+        """ Close every idle connection """
+        with self._lock:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        _close_all(idle)
+
+
+def _close_all(connections: list) -> None:
+    """ Close connections, ignoring the ones already dead """
+    for connection in connections:
+        try:
+            connection.close()
+        except Exception:
+            pass
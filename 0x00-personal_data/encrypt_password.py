@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 """ Password Encryption and Validation """
-import bcrypt
+from hashing_service import get_hashing_service
+from typing import Callable
 
 
 def hash_password(password: str) -> bytes:
     """ Passwords are essential for user authentication """
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_password
+    return get_hashing_service().hash_password(password)
 
 
-def is_valid(hashed_password: bytes, password: str) -> bool:
-    """ we must store them securely to prevent unauthorized access """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+def is_valid(hashed_password: bytes, password: str,
+             on_rehash: Callable[[bytes], None] = None) -> bool:
+    """ we must store them securely to prevent unauthorized access
+
+        When the password is valid but was hashed with an outdated
+        cost, a new hash is computed in the background and handed to
+        `on_rehash` so the caller can store it """
+    service = get_hashing_service()
+    if not service.is_valid(hashed_password, password):
+        return False
+    if on_rehash is not None:
+        service.rehash_if_needed(hashed_password, password, on_rehash)
+    return True
@@ -1,67 +1,285 @@
 #!/usr/bin/env python3
 """ Logging Model """
+import atexit
 import logging
+import logging.handlers
+import mysql.connector
+import queue
+import sys
+import threading
+import time
+from connection_pool import ConnectionPool, PooledConnection
+from functools import lru_cache, partial
 from mysql.connector.connection import MySQLConnection
 from os import environ
-from typing import List
-import re
+from typing import Callable, List, TextIO, Tuple
 
 
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
 
 
+class Redactor:
+    """ Redacts every PII field of a message in a single pass,
+        tokenizing on the separator instead of running one
+        regex substitution per field """
+
+    def __init__(self, fields: List[str], redaction: str, separator: str):
+        self.fields = frozenset(fields)
+        self.redaction = redaction
+        self.separator = separator
+
+    def __call__(self, message: str) -> str:
+        """ Return the message with every field value redacted """
+        fields, redaction = self.fields, self.redaction
+        parts = message.split(self.separator)
+        for i in range(len(parts) - 1):
+            key, eq, _ = parts[i].partition("=")
+            # strip() only for keys padded with whitespace
+            if eq and (key in fields or key.strip() in fields):
+                parts[i] = key + eq + redaction
+        return self.separator.join(parts)
+
+
+@lru_cache(maxsize=32)
+def _get_redactor(fields: Tuple[str], redaction: str,
+                  separator: str) -> Redactor:
+    """ Return a cached Redactor for the given parameters """
+    return Redactor(fields, redaction, separator)
+
+
 def filter_datum(fields: List[str], redaction: str,
                  message: str, separator: str) -> str:
     """ A function that returns an Obfuscate PII Fields """
-    for field in fields:
-        message = re.sub(f"{field}=.*?{separator}",
-                         f"{field}={redaction}{separator}", message)
-    return message
+    return _get_redactor(tuple(fields), redaction, separator)(message)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """ QueueHandler that enqueues raw records on a bounded queue
+
+        Redaction and formatting are left to the QueueListener worker.
+        When the queue is full, `overflow` decides what happens:
+        "block" waits for room, "drop" discards the record and
+        "sample" keeps one record out of `sample_every`, in place of
+        the oldest queued one, and drops the others. Only "block"
+        ever waits. """
+
+    OVERFLOW_POLICIES = ("block", "drop", "sample")
 
+    def __init__(self, log_queue: queue.Queue, overflow: str = "block",
+                 sample_every: int = 10):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self.dropped = 0
+        self._overflowed = 0
 
-def get_logger() -> logging.Logger:
-    """ A logging Instatiator """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """ Enqueue the record untouched """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """ Put the record on the queue, applying the overflow policy """
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        self._overflowed += 1
+        if self.overflow != "sample" \
+                or self._overflowed % self.sample_every:
+            self.dropped += 1
+            return
+        # make room by dropping the oldest record instead of waiting
+        try:
+            self.queue.get_nowait()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_log_listener = None
+_log_lock = threading.Lock()
+
+
+def attach_queue_handler(logger: logging.Logger, handler: logging.Handler,
+                         queue_size: int = 10000, overflow: str = "block"
+                         ) -> logging.handlers.QueueListener:
+    """ Route the records of `logger` to `handler` through a bounded
+        queue drained by a background QueueListener, and return the
+        started listener """
+    log_queue = queue.Queue(maxsize=queue_size)
+    logger.addHandler(BoundedQueueHandler(log_queue, overflow=overflow))
+    listener = logging.handlers.QueueListener(log_queue, handler,
+                                              respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def get_logger(queue_size: int = 10000,
+               overflow: str = "block") -> logging.Logger:
+    """ A logging Instatiator
+
+        Records are redacted and written by a background worker;
+        repeated calls return the same logger without adding handlers """
+    global _log_listener
     logger = logging.getLogger("user_data")
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
+    with _log_lock:
+        if _log_listener is not None:
+            return logger
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
 
-    streamHandler = logging.StreamHandler()
-    streamHandler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
-    logger.addHandler(streamHandler)
+        streamHandler = logging.StreamHandler()
+        streamHandler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
+        _log_listener = attach_queue_handler(logger, streamHandler,
+                                             queue_size=queue_size,
+                                             overflow=overflow)
+        atexit.register(_log_listener.stop)
 
     return logger
 
 
-def get_db() -> MySQLConnection:
-    """ Return a connector to MySQL database """
-    username = environ.get("PERSONAL_DATA_DB_USERNAME", "root")
-    passwrd = environ.get("PERSONAL_DATA_DB_PASSWORD", "")
-    host = environ.get("PERSONAL_DATA_DB_HOST", "localhost")
-    db_name = environ.get("PERSONAL_DATA_DB_NAME")
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
 
+def get_db_pool() -> ConnectionPool:
+    """ Return the connection pool shared by every get_db call,
+        configured from the PERSONAL_DATA_DB_* environment variables """
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is not None:
+            return _db_pool
+        connect = partial(mysql.connector.connect,
+                          user=environ.get("PERSONAL_DATA_DB_USERNAME",
+                                           "root"),
+                          password=environ.get("PERSONAL_DATA_DB_PASSWORD",
+                                               ""),
+                          host=environ.get("PERSONAL_DATA_DB_HOST",
+                                           "localhost"),
+                          database=environ.get("PERSONAL_DATA_DB_NAME"))
+        _db_pool = ConnectionPool(
+            connect,
+            size=int(environ.get("PERSONAL_DATA_DB_POOL_SIZE", 5)),
+            idle_timeout=float(environ.get(
+                "PERSONAL_DATA_DB_POOL_IDLE_TIMEOUT", 300)),
+            checkout_timeout=float(environ.get(
+                "PERSONAL_DATA_DB_POOL_TIMEOUT", 30)))
+        return _db_pool
+
+
+def get_db() -> PooledConnection:
+    """ Return a connector to MySQL database
+
+        The connection is checked out of the shared pool; closing it
+        rolls back what was left open and hands it back instead of
+        dropping the socket. Connection errors are raised as
+        mysql.connector.Error, and PoolExhausted once no connection
+        is free after PERSONAL_DATA_DB_POOL_TIMEOUT seconds """
+    return get_db_pool().acquire()
+
+
+class ExportProgress:
+    """ Throughput counter of a streaming export """
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """ Seconds since the export started """
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        """ Average number of rows exported per second """
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return "<ExportProgress rows={} batches={} rows/s={:.0f}>".format(
+            self.rows, self.batches, self.rows_per_sec)
+
+
+def _format_row(row: tuple, field_names: List[str]) -> str:
+    """ Render a users row as a key=value; log message """
+    return ''.join(f'{f}={str(r)}; ' for r, f in zip(row, field_names)).strip()
+
+
+def export_users(db: MySQLConnection, batch_size: int = 1000,
+                 stream: TextIO = None,
+                 on_batch: Callable[[ExportProgress], None] = None
+                 ) -> ExportProgress:
+    """ Stream every row of the users table to `stream` in the
+        filtered log format, `batch_size` rows at a time.
+
+        Rows are fetched with fetchmany from an unbuffered cursor and
+        each batch is redacted and written at once, so memory use only
+        depends on the batch size. `on_batch` is called with the
+        progress counter after every batch. """
+    if stream is None:
+        stream = sys.stderr
+    progress = ExportProgress()
+    redactor = Redactor(PII_FIELDS, RedactingFormatter.REDACTION,
+                        RedactingFormatter.SEPARATOR)
+    formatter = logging.Formatter(RedactingFormatter.FORMAT)
+
+    cursor = db.cursor(buffered=False)
     try:
-        connection = mysql.connector.connect(usr=username,
-                                             password=passwrd,
-                                             host=host,
-                                             database=db_name)
-    except mysql.connection.Error as error:
-        print(error)
-    return connection
+        cursor.execute("SELECT * FROM users;")
+        field_names = [i[0] for i in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            body = "\n".join(_format_row(row, field_names) for row in rows)
+            record = logging.LogRecord("user_data", logging.INFO, None,
+                                       None, "", None, None)
+            prefix = formatter.format(record)
+            body = redactor(body).replace("\n", "\n" + prefix)
+            stream.write(prefix + body + "\n")
+            stream.flush()
+            progress.rows += len(rows)
+            progress.batches += 1
+            if on_batch is not None:
+                on_batch(progress)
+    finally:
+        cursor.close()
+    return progress
 
 
 def main():
     """  Obtain a database connection using get_db and retrieves all rows
-        in the users table and display each row under a filtered format """
+        in the users table and display each row under a filtered format
 
+        When PERSONAL_DATA_EXPORT_BATCH_SIZE is set, rows are streamed
+        in batches of that size through export_users instead """
     db = get_db()
+    batch_size = environ.get("PERSONAL_DATA_EXPORT_BATCH_SIZE")
+    if batch_size:
+        progress = export_users(db, batch_size=int(batch_size))
+        print(progress, file=sys.stderr)
+        db.close()
+        return
+
     cursor = db.cursor()
-    cursor.execute("SELECT COUNT(*) FROM users;")
+    cursor.execute("SELECT * FROM users;")
     field_names = [i[0] for i in cursor.description]
     logger = get_logger()
 
     for row in cursor:
-        strRow = ''.join(f'{f}={str(r)}; ' for r, f in zip(row, field_names))
-        logger.info(strRow.strip())
+        logger.info(_format_row(row, field_names))
 
     cursor.close()
     db.close()
@@ -78,8 +296,12 @@ class RedactingFormatter(logging.Formatter):
     def __init__(self, fields: List[str]):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self.redactor = Redactor(fields, self.REDACTION, self.SEPARATOR)
 
     def format(self, record: logging.LogRecord) -> str:
-        record.msg = filter_datum(self.fields, self.REDACTION,
-                                  record.getMessage(), self.SEPARATOR)
+        record.msg = self.redactor(record.getMessage())
         return super().format(record)
+
+
+if __name__ == "__main__":
+    main()
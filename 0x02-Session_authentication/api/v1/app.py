@@ -3,6 +3,7 @@
 Route module for the API
 """
 from os import getenv
+from api.v1.auth.path_matcher import PathMatcher
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
@@ -12,21 +13,42 @@ import os
 app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
-auth = None
 AUTH_TYPE = getenv("AUTH_TYPE")
-
-if AUTH_TYPE == "auth":
-    from api.v1.auth.auth import Auth
-    auth = Auth()
-elif AUTH_TYPE == "basic_auth":
-    from api.v1.auth.basic_auth import BasicAuth
-    auth = BasicAuth()
-elif AUTH_TYPE == "session_auth":
-    from api.v1.auth.session_auth import SessionAuth
-    auth = SessionAuth()
-elif AUTH_TYPE == "session_exp_auth":
-    from api.v1.auth.session_exp_auth import SessionExpAuth
-    auth = SessionExpAuth()
+AUTH_SERVER_TIMING = getenv("AUTH_SERVER_TIMING", "").lower() \
+    in ("1", "true", "yes")
+EXCLUDED_PATHS = PathMatcher(['/api/v1/status/',
+                              '/api/v1/unauthorized/',
+                              '/api/v1/forbidden/',
+                              '/api/v1/auth_session/login/'])
+
+
+def make_auth(auth_type: str):
+    """ Return the authentication of an AUTH_TYPE, None if unknown """
+    if auth_type == "auth":
+        from api.v1.auth.auth import Auth
+        return Auth()
+    if auth_type == "basic_auth":
+        from api.v1.auth.basic_auth import BasicAuth
+        return BasicAuth()
+    if auth_type == "session_auth":
+        from api.v1.auth.session_auth import SessionAuth
+        return SessionAuth()
+    if auth_type == "session_exp_auth":
+        from api.v1.auth.session_exp_auth import SessionExpAuth
+        return SessionExpAuth()
+    return None
+
+
+# several comma separated types, e.g. "session_auth,basic_auth", are
+# all accepted, the cheapest tried first
+if AUTH_TYPE and "," in AUTH_TYPE:
+    from api.v1.auth.chain_auth import ChainAuth
+    schemes = {name: make_auth(name)
+               for name in map(str.strip, AUTH_TYPE.split(","))}
+    auth = ChainAuth({name: scheme for name, scheme in schemes.items()
+                      if scheme is not None})
+else:
+    auth = make_auth(AUTH_TYPE)
 
 
 @app.errorhandler(404)
@@ -54,23 +76,28 @@ def before_request():
     if auth is None:
         return None
 
-    excluded_paths = ['/api/v1/status/',
-                      '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/',
-                      '/api/v1/auth_session/login/']
-
-    if not auth.require_auth(request.path, excluded_paths=excluded_paths):
+    if not auth.require_auth(request.path, excluded_paths=EXCLUDED_PATHS):
         return
 
-    if auth.authorization_header(request) is None \
-            and auth.session_cookie(request) is None:
+    request.auth_context = auth.authenticate(request)
+    if not request.auth_context.has_credentials:
         abort(401)
 
-    request.current_user = auth.current_user(request)
+    request.current_user = request.auth_context.user
     if request.current_user is None:
         abort(403)
 
 
+@app.after_request
+def after_request(response):
+    """ Report the authentication stage timings when
+    AUTH_SERVER_TIMING is set """
+    context = getattr(request, "auth_context", None)
+    if AUTH_SERVER_TIMING and context is not None:
+        response.headers.add("Server-Timing", context.server_timing())
+    return response
+
+
 if __name__ == "__main__":
     host = getenv("API_HOST", "0.0.0.0")
     port = getenv("API_PORT", "5000")
@@ -1,21 +1,28 @@
 #!/usr/bin/env python3
 """ Authentication Module """
+from api.v1.auth.auth_context import AuthContext
+from api.v1.auth.path_matcher import PathMatcher, compile_paths
 from flask import request
-from typing import List, TypeVar
+from time import perf_counter
+from typing import List, TypeVar, Union
 import os
 
 
 class Auth:
     """ Class to manage the API authentication """
+    COST = 0
 
-    def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
+    def require_auth(self, path: str,
+                     excluded_paths: Union[List[str], PathMatcher]) -> bool:
         """ Determines if authentication is required
         based on the path and excluded paths.
 
         Args:
             path (str): The path to be checked.
-            excluded_paths (List[str]):
-            A list of paths that do not require authentication.
+            excluded_paths (List[str] or PathMatcher):
+            The paths that do not require authentication, a trailing
+            `*` matching any rest of the path. Pass a PathMatcher built
+            once rather than a list on hot paths.
         Returns:
             bool"""
         if path is None:
@@ -23,13 +30,10 @@ class Auth:
         if not excluded_paths:
             return True
 
-        path = path if path.endswith('/') else path + '/'
+        if not isinstance(excluded_paths, PathMatcher):
+            excluded_paths = compile_paths(tuple(excluded_paths))
 
-        for excluded_path in excluded_paths:
-            if excluded_path == path:
-                return False
-
-        return True
+        return not excluded_paths.matches(path)
 
     def authorization_header(self, request=None) -> str:
         """ Retrieves the authorization header from the request.
@@ -49,6 +53,29 @@ class Auth:
 
         Args:
             request: The Flask request object."""
+        return self.authenticate(request).user
+
+    def authenticate(self, request=None) -> AuthContext:
+        """ Reads the credentials of the request once and resolves
+        the user they belong to.
+
+        Args:
+            request: The Flask request object.
+
+        Returns:
+            AuthContext: the credentials, user and stage timings."""
+        start = perf_counter()
+        context = AuthContext(self.authorization_header(request),
+                              self.session_cookie(request))
+        context.lap("extract", start)
+        context.user = self.resolve_user(context)
+        return context
+
+    def resolve_user(self, context: AuthContext) -> TypeVar('User'):
+        """ Returns the user of already extracted credentials.
+
+        Args:
+            context (AuthContext): The credentials of the request."""
         return None
 
     def session_cookie(self, request=None):
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" Authentication Context Model """
+from time import perf_counter
+
+
+class AuthContext:
+    """ Credentials of one request, read once, and the user they
+    resolve to, the name of the scheme that accepted them when
+    several are chained, and the seconds spent in each stage:
+
+    - extract: reading the Authorization header and session cookie
+    - decode: parsing the credentials out of the header
+    - lookup: finding the session or the user
+    - verify: checking the password
+    """
+    __slots__ = ('authorization', 'session_id', 'user', 'scheme',
+                 'timings')
+    STAGES = ('extract', 'decode', 'lookup', 'verify')
+
+    def __init__(self, authorization: str = None, session_id: str = None):
+        """ Initialize with the extracted credentials """
+        self.authorization = authorization
+        self.session_id = session_id
+        self.user = None
+        self.scheme = None
+        self.timings = {}
+
+    @property
+    def has_credentials(self) -> bool:
+        """ True if the request carries a header or a cookie """
+        return self.authorization is not None or self.session_id is not None
+
+    def lap(self, stage: str, start: float) -> float:
+        """ Add the time since start to a stage, return the current time
+        to start the next one
+        """
+        now = perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - start
+        return now
+
+    def server_timing(self) -> str:
+        """ Timings as a Server-Timing header value, in milliseconds """
+        return ", ".join("auth-{};dur={:.3f}".format(stage, seconds * 1000)
+                         for stage, seconds in self.timings.items())
@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
 """ Basic Authorization Model """
 from api.v1.auth.auth import Auth
+from api.v1.auth.auth_context import AuthContext
+from api.v1.auth.credential_cache import CredentialCache
 import base64
 from models.user import User
+from os import getenv
+from time import perf_counter
 from typing import TypeVar
 
 
 class BasicAuth(Auth):
     """ Basic Authorization class that inherits from Auth """
+    COST = 10
+
+    def __init__(self):
+        """ Set up the cache of verified Authorization headers, sized by
+        BASIC_AUTH_CACHE_SIZE (0 disables it) and BASIC_AUTH_CACHE_TTL """
+        self.credential_cache = CredentialCache(
+            max_size=int(getenv("BASIC_AUTH_CACHE_SIZE", 1024)),
+            ttl=float(getenv("BASIC_AUTH_CACHE_TTL", 300)))
+        User.subscribe(self.credential_cache.invalidate)
 
     def extract_base64_authorization_header(self,
                                             authorization_header: str) -> str:
@@ -101,29 +114,53 @@ class BasicAuth(Auth):
 
         return None
 
-    def current_user(self, request=None) -> TypeVar('User'):
-        """ doc doc """
+    def resolve_user(self, context: AuthContext) -> TypeVar('User'):
+        """ Returns the User authenticated by the Authorization header.
 
-        auth_header = self.authorization_header(request)
+        A header verified before is resolved from the credential cache,
+        skipping decoding, lookup and password hashing; entries of a
+        user are dropped whenever that user is saved or removed. """
+
+        auth_header = context.authorization
 
         if not auth_header:
             return None
 
-        encode = self.extract_base64_authorization_header(auth_header)
-
-        if not encode:
-            return None
+        start = perf_counter()
+        user_id = self.credential_cache.get(auth_header)
+        if user_id is not None:
+            user = User.get(user_id)
+            if user is not None:
+                context.lap("lookup", start)
+                return user
 
+        encode = self.extract_base64_authorization_header(auth_header)
         decode = self.decode_base64_authorization_header(encode)
-
-        if not decode:
-            return None
-
         email, password = self.extract_user_credentials(decode)
+        start = context.lap("decode", start)
 
         if not email or not password:
             return None
 
-        user_credentials = self.user_object_from_credentials(email, password)
+        try:
+            users = User.search({"email": email})
+        except Exception:
+            return None
+        start = context.lap("lookup", start)
+
+        # a password reset during the slow check must not be undone by
+        # caching the old credential
+        generations = {user.id: self.credential_cache.generation(user.id)
+                       for user in users}
+        user_credentials = None
+        for user in users:
+            if user.is_valid_password(password):
+                user_credentials = user
+                break
+        context.lap("verify", start)
+
+        if user_credentials is not None:
+            self.credential_cache.put(auth_header, user_credentials.id,
+                                      generations[user_credentials.id])
 
         return user_credentials
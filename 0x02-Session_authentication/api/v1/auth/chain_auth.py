@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" Chain Authentication Model """
+from api.v1.auth.auth import Auth
+from api.v1.auth.auth_context import AuthContext
+from typing import Dict, TypeVar
+import threading
+
+
+class ChainAuth(Auth):
+    """ Accepts several authentication schemes at once
+
+    Schemes are tried from the cheapest to the most expensive, by their
+    COST, and the first one resolving a user wins: a session cookie is
+    a store lookup, while Basic credentials need decoding and a password
+    hash. Attributes the chain lacks, such as create_session, come from
+    the first scheme providing them.
+    """
+
+    def __init__(self, schemes: Dict[str, Auth]):
+        """ Initialize with the schemes by name """
+        self.schemes = sorted(schemes.items(), key=lambda item: item[1].COST)
+        self.hits = {name: 0 for name, _ in self.schemes}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        for _, scheme in self.__dict__.get("schemes", ()):
+            if hasattr(scheme, name):
+                return getattr(scheme, name)
+        raise AttributeError(name)
+
+    def resolve_user(self, context: AuthContext) -> TypeVar('User'):
+        """ Returns the User of the first scheme accepting the
+        credentials, recording it as context.scheme """
+        for name, scheme in self.schemes:
+            user = scheme.resolve_user(context)
+            if user is not None:
+                context.scheme = name
+                with self._lock:
+                    self.hits[name] += 1
+                return user
+        with self._lock:
+            self.misses += 1
+        return None
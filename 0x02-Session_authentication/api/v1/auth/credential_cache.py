@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Credential Cache Model """
+from models.ttl_cache import TTLCache
+import threading
+
+
+class CredentialCache:
+    """ Bounded, TTL evicted map of raw credentials to user IDs
+
+    Credentials are never stored: entries are keyed by an HMAC of the
+    credential (see models.ttl_cache.TTLCache).
+
+    Each invalidation bumps the generation of the user (or of every
+    user), so a credential verified across an invalidation is not
+    cached: pass put the generation read before verifying it.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        """ Initialize a cache of at most max_size entries,
+        each valid for ttl seconds
+        """
+        self._cache = TTLCache(max_size, ttl)
+        self._by_user = {}
+        self._generations = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, credential: str) -> str:
+        """ Return the user ID cached for a credential, or None """
+        if self._cache.max_size <= 0:
+            return None
+        return self._cache.get(self._cache.digest(credential))
+
+    def generation(self, user_id: str) -> tuple:
+        """ Current generation of a user's entries """
+        with self._lock:
+            return self._generation, self._generations.get(user_id, 0)
+
+    def put(self, credential: str, user_id: str,
+            generation: tuple = None) -> None:
+        """ Remember that a credential authenticates user_id, unless
+        the user was invalidated since `generation` was read """
+        if self._cache.max_size <= 0:
+            return
+        key = self._cache.digest(credential)
+        with self._lock:
+            if generation is not None and generation != (
+                    self._generation, self._generations.get(user_id, 0)):
+                return
+            self._forget(key, self._cache.pop(key))
+            self._by_user.setdefault(user_id, set()).add(key)
+            for old_key, old_user_id in self._cache.put(key, user_id):
+                self._forget(old_key, old_user_id)
+
+    def invalidate(self, user_id: str = None) -> None:
+        """ Forget the credentials of a user, or of everyone if None """
+        with self._lock:
+            if user_id is None:
+                self._generation += 1
+                self._cache.clear()
+                self._by_user.clear()
+                return
+            self._generations[user_id] = \
+                self._generations.get(user_id, 0) + 1
+            for key in self._by_user.pop(user_id, ()):
+                self._cache.pop(key)
+
+    def _forget(self, key: bytes, user_id: str) -> None:
+        """ Unlink a removed entry from its user; must be called with
+        the lock held """
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    @property
+    def hit_rate(self) -> float:
+        """ Fraction of lookups answered from the cache """
+        return self._cache.hit_rate
+
+    def stats(self) -> dict:
+        """ Counters of the cache """
+        return {"size": len(self._cache), "hits": self._cache.hits,
+                "misses": self._cache.misses,
+                "evictions": self._cache.evictions,
+                "hit_rate": self.hit_rate}
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Diagnostics Model """
+from itertools import count
+import logging
+import sys
+import threading
+
+
+class Diagnostics:
+    """ Counted, sampled debug events written to a logger
+
+    Events are only counted and formatted while the logger has DEBUG
+    enabled, and only one in `sample_every` is logged. Callers check
+    `enabled` before building an event, so a disabled channel costs
+    one level check.
+    """
+
+    def __init__(self, name: str, sample_every: int = 1,
+                 level: str = None):
+        """ Initialize a channel logging to the `name` logger,
+        optionally setting its level; the records then go to stderr
+        unless logging is configured to handle them
+        """
+        self.logger = logging.getLogger(name)
+        if level:
+            self.logger.setLevel(level.upper())
+            if not self.logger.hasHandlers():
+                handler = logging.StreamHandler(sys.stderr)
+                handler.setFormatter(logging.Formatter(
+                    "%(asctime)s %(name)s %(message)s"))
+                self.logger.addHandler(handler)
+        self.sample_every = max(1, sample_every)
+        self.counters = {}
+        self._sequence = count()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """ True if events are logged """
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def event(self, name: str, **fields) -> None:
+        """ Count an event and log it as `name key=value ...` when
+        the channel is enabled
+        """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+        if next(self._sequence) % self.sample_every:
+            return
+        self.logger.debug("%s %s", name, " ".join(
+            "{}={}".format(key, value) for key, value in fields.items()),
+            extra={"event": name, "fields": fields})
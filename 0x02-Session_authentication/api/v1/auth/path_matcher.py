@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Path Matcher Model """
+from functools import lru_cache
+from typing import List
+import re
+
+
+class PathMatcher:
+    """ Excluded paths compiled once into a set and a single pattern
+
+    A path matches a rule when both are equal once a trailing slash is
+    added to the path. In a rule, a trailing `*` matches any rest of
+    the path (`/api/v1/stat*` matches `/api/v1/status/`) and any other
+    `*` matches within one segment (`/api/v1/users/*/`). Recent
+    decisions are memoized in an LRU of `cache_size` paths.
+    """
+
+    def __init__(self, excluded_paths: List[str], cache_size: int = 1024):
+        """ Compile the excluded paths """
+        self.excluded_paths = list(excluded_paths)
+        self._exact = frozenset(path for path in self.excluded_paths
+                                if '*' not in path)
+        patterns = [self._pattern(path) for path in self.excluded_paths
+                    if '*' in path]
+        self._pattern_match = re.compile("|".join(patterns)).fullmatch \
+            if patterns else None
+        self.matches = lru_cache(cache_size)(self._matches)
+
+    def __len__(self) -> int:
+        return len(self.excluded_paths)
+
+    @staticmethod
+    def _pattern(path: str) -> str:
+        """ Regular expression of a wildcard rule """
+        prefix = path.endswith('*')
+        if prefix:
+            path = path[:-1]
+        pattern = "[^/]*".join(re.escape(part) for part in path.split('*'))
+        return "(?:{}{})".format(pattern, ".*" if prefix else "")
+
+    def _matches(self, path: str) -> bool:
+        """ True if the path is excluded """
+        if not path.endswith('/'):
+            path += '/'
+        if path in self._exact:
+            return True
+        return self._pattern_match is not None \
+            and self._pattern_match(path) is not None
+
+
+@lru_cache(maxsize=32)
+def compile_paths(excluded_paths: tuple) -> PathMatcher:
+    """ Matcher of a list of excluded paths, compiled once per list """
+    return PathMatcher(excluded_paths)
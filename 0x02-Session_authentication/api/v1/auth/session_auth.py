@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """ Session Authentication Model """
 from api.v1.auth.auth import Auth
+from api.v1.auth.auth_context import AuthContext
+from api.v1.auth.session_store import make_session_store
+from time import perf_counter
 from uuid import uuid4
 from models.user import User
 
@@ -8,8 +11,12 @@ from models.user import User
 class SessionAuth(Auth):
     """ Class that inherits from Auth
     to authorize a Session
+
+    Sessions live in a store shared by every instance, picked by the
+    SESSION_STORE environment variable (see make_session_store)
     """
-    user_id_by_session_id = {}
+    COST = 1
+    user_id_by_session_id = make_session_store()
 
     def create_session(self, user_id: str = None) -> str:
         """ Creates a session ID for a given user_id.
@@ -44,19 +51,19 @@ class SessionAuth(Auth):
 
         return self.user_id_by_session_id.get(session_id)
 
-    def current_user(self, request=None):
-        """ doc doc """
-        session_id = self.session_cookie(request=request)
+    def resolve_user(self, context: AuthContext):
+        """ Returns the User of the session cookie """
+        session_id = context.session_id
 
         if session_id is None:
             return None
 
+        start = perf_counter()
         user_id = self.user_id_for_session_id(session_id=session_id)
 
-        if user_id is None:
-            return None
-
-        return User.get(user_id)
+        user = None if user_id is None else User.get(user_id)
+        context.lap("lookup", start)
+        return user
 
     def destroy_session(self, request=None):
         """ Destroys the user session /
@@ -83,8 +90,4 @@ class SessionAuth(Auth):
         if not user_id:
             return False
 
-        if session_id in self.user_id_by_session_id:
-            self.user_id_by_session_id.pop(session_id)
-            return True
-
-        return False
+        return self.user_id_by_session_id.pop(session_id, None) is not None
@@ -1,21 +1,58 @@
 #!/usr/bin/env python3
 """ Module Session Duration """
+from api.v1.auth.diagnostics import Diagnostics
 from api.v1.auth.session_auth import SessionAuth
-from datetime import datetime, timedelta
 from os import getenv
+import heapq
+import threading
+import time
+
+_expiries = []
+_expiry_lock = threading.Condition()
+_reaper = None
+# sessions created by this process and not seen go yet
+_owned = set()
+_counts = {"expired": 0}
+_diagnostics = Diagnostics("api.v1.auth.session",
+                           int(getenv("SESSION_DIAG_SAMPLE", 1)),
+                           getenv("SESSION_DIAG_LEVEL"))
 
 
 class SessionExpAuth(SessionAuth):
     """ Class that inherits from SessionAuth
-      that Exires Session Authentication  """
+      that Exires Session Authentication
+
+    Sessions are kept in a heap ordered by expiry: a background reaper
+    removes them from the store as they expire, and a lookup of an
+    expired session removes it on the spot.
+
+    The heap and the counters are per process: with a store shared by
+    several workers, each one reaps and counts the sessions it created.
+    Sessions of a worker that stopped are only removed when looked up.
+
+    With SESSION_SLIDING set, a session is renewed by its lookups: it
+    expires session_duration seconds after its last renewal write
+    instead of after its creation. Renewals are written at most once
+    per SESSION_RENEW_INTERVAL seconds, capped at half the duration so
+    a session in use is always renewed before it expires. Timestamps
+    are time.monotonic() values.
+
+    Debug events go to the "api.v1.auth.session" logger, enabled with
+    SESSION_DIAG_LEVEL=debug (written to stderr unless logging is
+    configured) and sampled one in SESSION_DIAG_SAMPLE.
+    """
+    REAP_INTERVAL = float(getenv("SESSION_REAP_INTERVAL", 60))
 
     def __init__(self):
         """ Instance attribute of session duration """
         super().__init__()
         try:
             self.session_duration = int(getenv("SESSION_DURATION"))
-        except ValueError:
+        except (TypeError, ValueError):
             self.session_duration = 0
+        self.sliding = getenv("SESSION_SLIDING", "").lower() \
+            in ("1", "true", "yes")
+        self.renew_interval = float(getenv("SESSION_RENEW_INTERVAL", 60))
 
     def create_session(self, user_id=None):
         """ Create a session with expiration details.
@@ -32,14 +69,21 @@ class SessionExpAuth(SessionAuth):
         if not session_id:
             return None
 
+        now = time.monotonic()
         session_data = {
             "user_id": user_id,
-            "created_at": datetime.now()
+            "created_at": now,
+            "renewed_at": now
         }
         self.user_id_by_session_id[session_id] = session_data
+        if self.session_duration > 0:
+            with _expiry_lock:
+                _owned.add(session_id)
+            self._schedule(session_id, self._expires_at(session_data))
 
-        print(f"Created session: {session_data}")
-        print(f"All the sessions: {self.user_id_by_session_id}")
+        if _diagnostics.enabled:
+            _diagnostics.event("session_created", user_id=user_id,
+                               duration=self.session_duration)
 
         return session_id
 
@@ -64,15 +108,141 @@ class SessionExpAuth(SessionAuth):
         if self.session_duration <= 0:
             return session_dict.get("user_id")
 
-        created_at = session_dict.get("created_at")
-        if created_at is None:
+        if session_dict.get("created_at") is None:
             return None
 
-        expiration_time = created_at + timedelta(seconds=self.session_duration)
+        now = time.monotonic()
+        expiration_time = self._expires_at(session_dict)
 
-        if expiration_time < datetime.now():
+        # a timestamp ahead of the clock was taken before a reboot
+        if expiration_time < now or session_dict["created_at"] > now:
+            self._expire(session_id)
+            if _diagnostics.enabled:
+                _diagnostics.event("session_expired",
+                                   user_id=session_dict.get("user_id"))
             return None
 
-        print(f"Expiration time: {expiration_time}")
+        if self.sliding and now - session_dict["renewed_at"] >= \
+                min(self.renew_interval, self.session_duration / 2):
+            # a session destroyed meanwhile must stay gone
+            if not self.user_id_by_session_id.replace(
+                    session_id, dict(session_dict, renewed_at=now)):
+                return None
+            if _diagnostics.enabled:
+                _diagnostics.event("session_renewed",
+                                   user_id=session_dict.get("user_id"))
+
+        if _diagnostics.enabled:
+            _diagnostics.event("session_checked",
+                               user_id=session_dict.get("user_id"),
+                               expires_in=round(expiration_time - now, 3))
 
         return session_dict.get("user_id")
+
+    def destroy_session(self, request=None):
+        """ Destroys the user session, leaving its heap entry to be
+        dropped when it comes due or when the heap is compacted
+        """
+        session_id = self.session_cookie(request)
+        if not super().destroy_session(request):
+            return False
+        if self.session_duration > 0:
+            with _expiry_lock:
+                _owned.discard(session_id)
+                self._compact_if_stale()
+        return True
+
+    def _expires_at(self, session_dict: dict) -> float:
+        """ Expiry of a session as a time.monotonic() timestamp """
+        if self.sliding:
+            return session_dict["renewed_at"] + self.session_duration
+        return session_dict["created_at"] + self.session_duration
+
+    def _schedule(self, session_id: str, expires_at: float):
+        """ Add a session to the expiry heap, waking the reaper if it
+        is now the first one due
+        """
+        global _reaper
+        with _expiry_lock:
+            heapq.heappush(_expiries, (expires_at, session_id))
+            if _expiries[0][1] == session_id:
+                _expiry_lock.notify()
+            if _reaper is None:
+                _reaper = threading.Thread(target=self._run_reaper,
+                                           name="session-reaper",
+                                           daemon=True)
+                _reaper.start()
+
+    def _expire(self, session_id: str) -> bool:
+        """ Remove an expired session from the store """
+        if self.user_id_by_session_id.pop(session_id, None) is None:
+            return False
+        with _expiry_lock:
+            _owned.discard(session_id)
+            _counts["expired"] += 1
+            self._compact_if_stale()
+        return True
+
+    def _compact_if_stale(self):
+        """ Rebuild the heap without the entries of sessions already
+        gone once they are the majority, so it stays proportional to
+        the live sessions. Called with _expiry_lock held
+        """
+        if len(_expiries) - len(_owned) <= len(_expiries) // 2:
+            return
+        _expiries[:] = [entry for entry in _expiries if entry[1] in _owned]
+        heapq.heapify(_expiries)
+
+    def reap(self, now: float = None) -> int:
+        """ Remove every session due by now, return how many expired
+        """
+        if now is None:
+            now = time.monotonic()
+        due = []
+        with _expiry_lock:
+            while _expiries and _expiries[0][0] <= now:
+                due.append(heapq.heappop(_expiries)[1])
+        expired = 0
+        for session_id in due:
+            session_dict = self.user_id_by_session_id.get(session_id)
+            if session_dict is None:
+                # removed by another process sharing the store
+                with _expiry_lock:
+                    _owned.discard(session_id)
+                continue
+            expires_at = self._expires_at(session_dict)
+            if expires_at > now:
+                self._schedule(session_id, expires_at)
+            elif self._expire(session_id):
+                expired += 1
+        return expired
+
+    def _run_reaper(self):
+        """ Sleep until the next session is due, at most REAP_INTERVAL
+        seconds, then reap
+        """
+        while True:
+            with _expiry_lock:
+                timeout = self.REAP_INTERVAL
+                if _expiries:
+                    timeout = min(timeout,
+                                  _expiries[0][0] - time.monotonic())
+                if timeout > 0:
+                    _expiry_lock.wait(timeout)
+            self.reap()
+
+    @property
+    def live_sessions(self) -> int:
+        """ Number of sessions created by this process and waiting to
+        expire """
+        return len(_owned)
+
+    @property
+    def expired_sessions(self) -> int:
+        """ Number of sessions removed because they expired """
+        return _counts["expired"]
+
+    @property
+    def diagnostics(self) -> Diagnostics:
+        """ Channel of the session debug events and their counters """
+        return _diagnostics
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+""" Session Store Model """
+from collections.abc import MutableMapping
+from datetime import datetime
+from os import getenv
+from typing import Iterator
+import json
+import sqlite3
+import threading
+
+
+class SessionStore(MutableMapping):
+    """ Interface of a session store: a thread-safe mapping of
+    session ID to session data (a user ID or a JSON-able dict) """
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def replace(self, session_id: str, value) -> bool:
+        """ Set the data of a session only if it still exists, return
+        whether it did; stores override it to do so atomically """
+        if session_id not in self:
+            return False
+        self[session_id] = value
+        return True
+
+
+class ShardedSessionStore(SessionStore):
+    """ In-process store split into shards, each behind its own lock,
+    so threads working on different sessions rarely contend """
+
+    def __init__(self, shards: int = 16):
+        """ Initialize the given number of shards """
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._count = shards
+
+    def __getitem__(self, session_id: str):
+        shard, lock = self._shards[hash(session_id) % self._count]
+        with lock:
+            return shard[session_id]
+
+    def get(self, session_id: str, default=None):
+        """ Return the data of a session, default if there is none """
+        shard, lock = self._shards[hash(session_id) % self._count]
+        with lock:
+            return shard.get(session_id, default)
+
+    def __setitem__(self, session_id: str, value) -> None:
+        shard, lock = self._shards[hash(session_id) % self._count]
+        with lock:
+            shard[session_id] = value
+
+    def __delitem__(self, session_id: str) -> None:
+        shard, lock = self._shards[hash(session_id) % self._count]
+        with lock:
+            del shard[session_id]
+
+    def pop(self, session_id: str, *default):
+        """ Remove a session and return its data """
+        shard, lock = self._shards[hash(session_id) % self._count]
+        with lock:
+            return shard.pop(session_id, *default)
+
+    def replace(self, session_id: str, value) -> bool:
+        """ Set the data of a session only if it still exists """
+        shard, lock = self._shards[hash(session_id) % self._count]
+        with lock:
+            if session_id not in shard:
+                return False
+            shard[session_id] = value
+            return True
+
+    def __iter__(self) -> Iterator[str]:
+        for shard, lock in self._shards:
+            with lock:
+                session_ids = list(shard)
+            yield from session_ids
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard, _ in self._shards)
+
+
+def _encode(value) -> str:
+    """ JSON encode session data, datetimes included """
+    def default(obj):
+        if isinstance(obj, datetime):
+            return {"__datetime__": obj.isoformat()}
+        raise TypeError("can't store {} in a session".format(type(obj)))
+    return json.dumps(value, default=default)
+
+
+def _decode(text: str):
+    """ Decode session data written by _encode """
+    def object_hook(obj):
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
+    return json.loads(text, object_hook=object_hook)
+
+
+class SQLiteSessionStore(SessionStore):
+    """ Store kept in an SQLite file, shared by every worker process of
+    the host that opens the same path. Each thread uses its own
+    connection; the database runs in WAL mode so readers do not block
+    the writer """
+
+    def __init__(self, file_path: str = ".db_sessions.sqlite3",
+                 timeout: float = 5.0):
+        """ Open (and create if needed) the sessions database """
+        self.file_path = file_path
+        self.timeout = timeout
+        self._local = threading.local()
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS sessions "
+                   "(session_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+    def _db(self) -> sqlite3.Connection:
+        """ Connection of the current thread """
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.file_path, timeout=self.timeout,
+                                 isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def __getitem__(self, session_id: str):
+        row = self._db().execute(
+            "SELECT data FROM sessions WHERE session_id = ?",
+            (session_id,)).fetchone()
+        if row is None:
+            raise KeyError(session_id)
+        return _decode(row[0])
+
+    def __setitem__(self, session_id: str, value) -> None:
+        self._db().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data) "
+            "VALUES (?, ?)", (session_id, _encode(value)))
+
+    def __delitem__(self, session_id: str) -> None:
+        cursor = self._db().execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(session_id)
+
+    def pop(self, session_id: str, *default):
+        """ Remove a session and return its data, in one transaction """
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT data FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+            if row is not None:
+                db.execute("DELETE FROM sessions WHERE session_id = ?",
+                           (session_id,))
+        finally:
+            db.execute("COMMIT")
+        if row is not None:
+            return _decode(row[0])
+        if default:
+            return default[0]
+        raise KeyError(session_id)
+
+    def replace(self, session_id: str, value) -> bool:
+        """ Set the data of a session only if it still exists """
+        return self._db().execute(
+            "UPDATE sessions SET data = ? WHERE session_id = ?",
+            (_encode(value), session_id)).rowcount > 0
+
+    def __contains__(self, session_id) -> bool:
+        return self._db().execute(
+            "SELECT 1 FROM sessions WHERE session_id = ?",
+            (session_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._db().execute("SELECT session_id FROM sessions")
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._db().execute(
+            "SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def make_session_store() -> SessionStore:
+    """ Build the store selected by SESSION_STORE: "memory" (default,
+    sharded by SESSION_STORE_SHARDS) or "sqlite" (file at
+    SESSION_STORE_PATH) """
+    kind = getenv("SESSION_STORE", "memory")
+    if kind == "sqlite":
+        return SQLiteSessionStore(
+            getenv("SESSION_STORE_PATH", ".db_sessions.sqlite3"))
+    if kind == "memory":
+        return ShardedSessionStore(int(getenv("SESSION_STORE_SHARDS", 16)))
+    raise ValueError("unknown SESSION_STORE: {}".format(kind))
@@ -2,18 +2,167 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from datetime import datetime, timezone
+from flask import Response, abort, jsonify, request, url_for
+from itertools import islice
 from models.user import User
+from typing import Iterable, Iterator
+import hashlib
+import json
+
+STREAM_CHUNK_SIZE = 256
+LISTING_PARAMETERS = ('format', 'limit', 'after', 'fields')
+
+
+def _encoder(fields: list = None):
+    """ Return a function encoding a user as a JSON string,
+    restricted to the given fields if any
+    """
+    if not fields:
+        return lambda user: user.to_json_str()
+
+    def encode(user):
+        user_json = user.to_json()
+        return json.dumps({k: user_json[k] for k in fields})
+    return encode
+
+
+def _not_modified(etag: str, last_modified: datetime = None) -> bool:
+    """ True if the client copy described by If-None-Match, or else
+    If-Modified-Since, is still current
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    if since is None or last_modified is None:
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _set_validators(response: Response, etag: str,
+                    last_modified: datetime = None) -> Response:
+    """ Add the ETag and Last-Modified headers to a response
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def _json_user(user: User) -> Response:
+    """ Return a user as JSON, or 304 if the client copy is current
+    """
+    if _not_modified(user.etag, user.updated_at):
+        return _set_validators(Response(status=304), user.etag,
+                               user.updated_at)
+    return _set_validators(jsonify(user.to_json()), user.etag,
+                           user.updated_at)
+
+
+def _chunks(users: Iterable) -> Iterator[list]:
+    """ Yield lists of up to STREAM_CHUNK_SIZE users
+    """
+    users = iter(users)
+    while True:
+        chunk = list(islice(users, STREAM_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _stream_json_array(users: Iterable, encode):
+    """ Yield a JSON array of users, STREAM_CHUNK_SIZE users at a time
+    """
+    yield "["
+    separator = ""
+    for chunk in _chunks(users):
+        yield separator + ",".join(encode(user) for user in chunk)
+        separator = ","
+    yield "]\n"
+
+
+def _stream_ndjson(users: Iterable, encode):
+    """ Yield users as newline-delimited JSON, STREAM_CHUNK_SIZE
+    users at a time
+    """
+    for chunk in _chunks(users):
+        yield "".join(encode(user) + "\n" for user in chunk)
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - format: "ndjson" to get one JSON object per line
+      - limit: maximum number of users to return
+      - after: ID of the last user of the previous page
+      - fields: comma separated list of attributes to return
+      - any other User attribute: only return users with this value
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, streamed, in ID order;
+        a Link header points to the next page when there may be one
+      - 304 if If-None-Match or If-Modified-Since match the listing
+      - 400 if a parameter is invalid
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    attributes = [name for name in User.public_attributes()
+                  if name not in User.TIMESTAMP_ATTRIBUTES]
+
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = -1
+        if limit < 1:
+            return jsonify({'error': "limit must be a positive integer"}), 400
+
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = [field for field in fields.split(',') if field]
+        unknown = set(fields) - set(User.public_attributes())
+        if unknown:
+            return jsonify({'error': "unknown fields: {}".format(
+                ", ".join(sorted(unknown)))}), 400
+
+    filters = {}
+    for key, value in request.args.items():
+        if key in LISTING_PARAMETERS:
+            continue
+        if key not in attributes:
+            return jsonify({'error': "can't filter on {}".format(key)}), 400
+        filters[key] = value
+
+    variant = ""
+    if request.query_string:
+        variant = "-" + hashlib.sha1(request.query_string).hexdigest()[:12]
+    etag = User.collection_etag(variant)
+    last_modified = User.last_modified()
+    if _not_modified(etag, last_modified):
+        return _set_validators(Response(status=304), etag, last_modified)
+
+    # a page is bounded by its limit; a full listing is read from the
+    # store as it is streamed
+    if limit is None:
+        users = User.iter_search(filters, after=request.args.get('after'))
+    else:
+        users = User.search_page(filters, limit=limit,
+                                 after=request.args.get('after'))
+    encode = _encoder(fields)
+    if request.args.get('format') == 'ndjson':
+        response = Response(_stream_ndjson(users, encode),
+                            mimetype='application/x-ndjson')
+    else:
+        response = Response(_stream_json_array(users, encode),
+                            mimetype='application/json')
+
+    if limit is not None and len(users) == limit:
+        args = request.args.to_dict()
+        args['after'] = users[-1].id
+        response.headers['Link'] = '<{}>; rel="next"'.format(
+            url_for('app_views.view_all_users', **args))
+    return _set_validators(response, etag, last_modified)
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -23,17 +172,18 @@ def view_one_user(user_id: str = None) -> str:
       - User ID
     Return:
       - User object JSON represented
+      - 304 if If-None-Match or If-Modified-Since match the user
       - 404 if the User ID doesn't exist
     """
     if user_id == "me":
         if request.current_user is None:
             abort(404)
-        return jsonify(request.current_user.to_json()), 200
+        return _json_user(request.current_user)
 
     user = User.get(user_id)
     if user is None:
         abort(404)
-    return jsonify(user.to_json())
+    return _json_user(user)
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
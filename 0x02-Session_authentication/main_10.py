@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Main 10
+Session create/lookup throughput of the session stores, and of the
+plain dict behind a single lock they replace, at 1, 8 and 32 threads
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from uuid import uuid4
+from api.v1.auth.session_store import (SessionStore, ShardedSessionStore,
+                                       SQLiteSessionStore)
+
+operations = int(sys.argv[1]) if len(sys.argv) > 1 else 64000
+
+
+class LockedDictStore(SessionStore):
+    """ Previous layout: one dict, one lock """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, session_id):
+        with self._lock:
+            return self._sessions[session_id]
+
+    def __setitem__(self, session_id, value):
+        with self._lock:
+            self._sessions[session_id] = value
+
+    def get(self, session_id, default=None):
+        with self._lock:
+            return self._sessions.get(session_id, default)
+
+    def __delitem__(self, session_id):
+        with self._lock:
+            del self._sessions[session_id]
+
+    def __iter__(self):
+        return iter(list(self._sessions))
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+def run(store, threads: int, count: int) -> float:
+    """ Create then look up `count` sessions per thread, return ops/sec """
+    # the barrier actions run as the barriers trip, before any worker
+    # is released, so the clock reads can't lag behind the workers
+    times = {}
+    start = threading.Barrier(
+        threads, action=lambda: times.update(start=time.perf_counter()))
+    end = threading.Barrier(
+        threads, action=lambda: times.update(end=time.perf_counter()))
+
+    def work():
+        session_ids = [str(uuid4()) for _ in range(count)]
+        start.wait()
+        for session_id in session_ids:
+            store[session_id] = "user"
+        for session_id in session_ids:
+            store.get(session_id)
+        end.wait()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return 2 * threads * count / (times["end"] - times["start"])
+
+
+tmp_dir = tempfile.mkdtemp()
+stores = [
+    ("dict + lock", lambda: LockedDictStore(), operations),
+    ("sharded", lambda: ShardedSessionStore(), operations),
+    ("sqlite", lambda: SQLiteSessionStore(
+        os.path.join(tmp_dir, "{}.sqlite3".format(uuid4()))),
+     operations // 16),
+]
+for name, factory, total in stores:
+    for threads in (1, 8, 32):
+        ops = run(factory(), threads, max(1, total // 2 // threads))
+        print("{:12} {:>2} threads: {:>10,.0f} ops/sec".format(
+            name, threads, ops))
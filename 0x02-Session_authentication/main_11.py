@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+""" Main 11
+Login throughput of SessionExpAuth with 100k live sessions, against
+the previous create_session that printed the whole session table
+"""
+import contextlib
+import logging
+import os
+import sys
+import time
+from api.v1.auth.session_exp_auth import SessionExpAuth
+
+live = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+class PrintingSessionExpAuth(SessionExpAuth):
+    """ Previous create_session: debug prints on every login """
+
+    def __init__(self):
+        super().__init__()
+        self.session_duration = 3600
+
+    def create_session(self, user_id=None):
+        session_id = super().create_session(user_id)
+        session_data = self.user_id_by_session_id[session_id]
+        print(f"Created session: {session_data}")
+        print(f"All the sessions: {self.user_id_by_session_id}")
+        return session_id
+
+
+def logins_per_sec(auth, logins: int) -> float:
+    """ Time `logins` create_session calls, stdout sent to /dev/null """
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for i in range(logins):
+            auth.create_session("user-{}".format(i))
+        return logins / (time.perf_counter() - start)
+
+
+auth = SessionExpAuth()
+auth.session_duration = 3600
+for i in range(live):
+    auth.create_session("user-{}".format(i))
+print("{:,} live sessions".format(auth.live_sessions))
+
+print("printing tables:     {:>10,.1f} logins/sec".format(
+    logins_per_sec(PrintingSessionExpAuth(), 20)))
+print("diagnostics off:     {:>10,.1f} logins/sec".format(
+    logins_per_sec(auth, 20000)))
+
+logging.basicConfig(stream=open(os.devnull, "w"))
+auth.diagnostics.logger.setLevel(logging.DEBUG)
+auth.diagnostics.sample_every = 100
+print("diagnostics 1/100:   {:>10,.1f} logins/sec".format(
+    logins_per_sec(auth, 20000)))
+print("counters: {}".format(auth.diagnostics.counters))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+""" Main 12
+Cost of Auth.require_auth per request against the number of excluded
+paths: the previous linear scan against a compiled PathMatcher
+"""
+import random
+import timeit
+from api.v1.auth.auth import Auth
+from api.v1.auth.path_matcher import PathMatcher
+
+
+def linear_require_auth(path, excluded_paths):
+    """ Previous require_auth """
+    if path is None:
+        return True
+    if not excluded_paths:
+        return True
+    path = path if path.endswith('/') else path + '/'
+    for excluded_path in excluded_paths:
+        if excluded_path.endswith('*'):
+            if path.startswith(excluded_path[:-1]):
+                return False
+        elif excluded_path == path:
+            return False
+    return True
+
+
+auth = Auth()
+requests = ["/api/v1/users/{}".format(i) for i in range(500)] \
+    + ["/api/v1/status"] * 100
+random.seed(0)
+random.shuffle(requests)
+
+for size in (4, 100, 500):
+    excluded_paths = ["/api/v1/public/{}/".format(i) for i in range(size)]
+    excluded_paths[size // 2] = "/api/v1/assets/*"
+    excluded_paths[-1] = "/api/v1/status/"
+    matcher = PathMatcher(excluded_paths)
+
+    def run(check):
+        for path in requests:
+            check(path)
+
+    linear = min(timeit.repeat(
+        lambda: run(lambda p: linear_require_auth(p, excluded_paths)),
+        number=10, repeat=3)) / (10 * len(requests))
+    compiled = min(timeit.repeat(
+        lambda: run(lambda p: auth.require_auth(p, matcher)),
+        number=10, repeat=3)) / (10 * len(requests))
+    print("{:>3} rules: linear {:6.2f}us  compiled {:6.2f}us".format(
+        size, linear * 1e6, compiled * 1e6))
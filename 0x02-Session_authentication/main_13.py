@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+""" Main 13
+Password verifications per second of each hasher, hashing on every
+call and with the verified-credential memo
+"""
+import time
+from models import password
+from models.password import get_hasher, verify_password
+
+seconds = 1.0
+
+
+def per_sec(hashed: str) -> float:
+    """ Verify the same password for about `seconds` """
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        verify_password("H0lbertonSchool98!", hashed)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+for name in password.HASHERS:
+    try:
+        hashed = get_hasher(name).hash("H0lbertonSchool98!")
+    except ImportError as e:
+        print("{:14} skipped: {}".format(name, e))
+        continue
+    password.memo.max_size = 0
+    cold = per_sec(hashed)
+    password.memo.max_size = 1024
+    password.memo.clear()
+    warm = per_sec(hashed)
+    print("{:14} no memo {:>12,.1f}/sec   memo {:>12,.1f}/sec".format(
+        name, cold, warm))
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+""" Main 7
+Email lookup through User.search: linear scan against the email index
+"""
+import sys
+import timeit
+from models.base import DATA
+from models.user import User
+
+sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+
+for size in sizes:
+    DATA['User'] = {}
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i))
+        DATA['User'][user.id] = user
+    User.build_indexes()
+    email = "user{}@hbtn.io".format(size // 2)
+
+    number = 20
+    indexed = timeit.timeit(lambda: User.search({"email": email}),
+                            number=number) / number
+    linear = timeit.timeit(
+        lambda: [u for u in DATA['User'].values() if u.email == email],
+        number=number) / number
+    print("{:>8} users: linear {:10.1f}us, indexed {:6.1f}us".format(
+        size, linear * 1e6, indexed * 1e6))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Main 8
+Cold start of User.load_from_file on a large .db_User.json
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from models.base import DATA, TIMESTAMP_FORMAT
+from models.user import User
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+# keep the app's .db_User.json and journal out of the benchmark
+os.chdir(tempfile.mkdtemp())
+now = datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+with open(".db_User.json", "w") as f:
+    json.dump({str(i): {"id": str(i), "created_at": now, "updated_at": now,
+                        "email": "user{}@hbtn.io".format(i),
+                        "_password": "0" * 64, "first_name": None,
+                        "last_name": None} for i in range(size)}, f)
+
+
+class LegacyUser():
+    """ Previous User: Base.__init__ parsing timestamps with strptime
+    and computing a uuid4 default even when an id is given """
+
+    def __init__(self, *args, **kwargs):
+        s_class = "User"
+        if DATA.get(s_class) is None:
+            DATA[s_class] = {}
+
+        self.id = kwargs.get('id', str(uuid.uuid4()))
+        if kwargs.get('created_at') is not None:
+            self.created_at = datetime.strptime(kwargs.get('created_at'),
+                                                TIMESTAMP_FORMAT)
+        else:
+            self.created_at = datetime.utcnow()
+        if kwargs.get('updated_at') is not None:
+            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
+                                                TIMESTAMP_FORMAT)
+        else:
+            self.updated_at = datetime.utcnow()
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+def legacy_load():
+    """ load_from_file as it was: json.load then cls(**obj_json) """
+    with open(".db_User.json") as f:
+        DATA['User'] = {obj_id: LegacyUser(**obj_json)
+                        for obj_id, obj_json in json.load(f).items()}
+
+
+for name, load in (("legacy", legacy_load),
+                   ("load_from_file", User.load_from_file),
+                   ("load_from_file(stream=True)",
+                    lambda: User.load_from_file(stream=True))):
+    DATA['User'] = {}
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    DATA['User'] = {}
+    tracemalloc.start()
+    load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("{:<28} {:>8} users: {:6.2f}s, peak {:7.1f} MB".format(
+        name, User.count(), elapsed, peak / 2 ** 20))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+""" Main 9
+Memory per User and to_json throughput, slotted User against a
+__dict__ based copy of the previous implementation
+"""
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from models.base import TIMESTAMP_FORMAT
+from models.user import User
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+
+class DictUser():
+    """ Previous layout: attributes in __dict__, generic to_json """
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.get('id')
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+    def to_json(self, for_serialization=False):
+        result = {}
+        for key, value in self.__dict__.items():
+            if not for_serialization and key[0] == '_':
+                continue
+            if type(value) is datetime:
+                result[key] = value.strftime(TIMESTAMP_FORMAT)
+            else:
+                result[key] = value
+        return result
+
+
+now = datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+for name, build in (
+        ("__dict__", lambda i: DictUser(id=str(i), email=str(i))),
+        ("__slots__", lambda i: User.from_json(
+            {"id": str(i), "created_at": now, "updated_at": now,
+             "email": str(i)}))):
+    tracemalloc.start()
+    users = [build(i) for i in range(size)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    number = min(size, 200000)
+    cold = timeit.timeit(lambda: [u.to_json() for u in users[:number]],
+                         number=1)
+    warm = timeit.timeit(lambda: [u.to_json() for u in users[:number]],
+                         number=1)
+    print("{:<10} {:>4.0f} bytes/user, to_json {:>8.0f} ops/s first call, "
+          "{:>8.0f} ops/s next calls".format(
+              name, used / size, number / cold, number / warm))
+    del users
@@ -1,20 +1,112 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from contextlib import contextmanager
+from itertools import islice
+from operator import attrgetter
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from models.journal import Journal
+from models.lazy import LazyObjects
+from models.sorted_ids import SortedIds
+from typing import TypeVar, List, Iterable, Iterator
+from os import getenv, path
+import atexit
 import json
+import os
+import re
+import threading
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+# IDs of the stored objects of each class, as SortedIds
+ORDERS = {}
+JOURNALS = {}
+# per class change counter and time of the last change, bumped by every
+# save and remove; BOOT_ID tells counters of different processes apart
+VERSIONS = {}
+LAST_MODIFIED = {}
+BOOT_ID = uuid.uuid4().hex[:8]
+# callbacks run with the object ID after each save or remove of a
+# class, and with None when the whole class is reloaded
+SUBSCRIBERS = {}
+# changes not written yet in write-behind mode: {class: {id: obj}},
+# obj being None for a removed object
+DIRTY = {}
+BULK = {}
+_dirty_lock = threading.Lock()
+_flush_wakeup = threading.Event()
+_flusher = None
+_flush_intervals = set()
+_SERIALIZERS = {}
+
+
+class _Serializer():
+    """ Attribute layout of a model class, computed once from the
+    __slots__ of its MRO and used by to_json and from_json
+    """
+
+    def __init__(self, cls: type):
+        """ Initialize the layout of cls
+        """
+        fields = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                if name not in fields and name not in Base.INTERNAL_SLOTS:
+                    fields.append(name)
+        self.fields = tuple(fields)
+        self.public = tuple(name for name in fields if name[0] != '_')
+        self.timestamps = tuple(name for name in fields
+                                if name in cls.TIMESTAMP_ATTRIBUTES)
+        self.get_fields = attrgetter(*self.fields)
+        self.get_public = attrgetter(*self.public)
+        self.get_timestamps = attrgetter(*self.timestamps)
+
+
+def _serializer(cls: type) -> _Serializer:
+    """ Return the cached layout of a model class
+    """
+    serializer = _SERIALIZERS.get(cls)
+    if serializer is None:
+        serializer = _SERIALIZERS[cls] = _Serializer(cls)
+    return serializer
 
 
 class Base():
     """ Base class
+
+    Attributes live in __slots__: subclasses declare theirs, and must
+    set each of them in __init__
     """
+    __slots__ = ('id', 'created_at', 'updated_at', '_version',
+                 '_json_cache', '__weakref__')
+
+    # slots that are not part of the JSON representation
+    INTERNAL_SLOTS = ('_json_cache', '__weakref__')
+    # datetime attributes, serialized with TIMESTAMP_FORMAT
+    TIMESTAMP_ATTRIBUTES = ('created_at', 'updated_at')
+
+    # attributes with a hash index, kept in INDEXES[class][attribute]
+    # as {value: set of IDs} for every stored object
+    INDEXED_ATTRIBUTES = ()
+
+    # number of objects kept built when loading lazily; 0 builds every
+    # object in load_from_file
+    LAZY_CACHE_SIZE = int(getenv("MODELS_LAZY_CACHE_SIZE", 0))
+
+    # journal size in bytes that triggers a background compaction
+    # into the .db_<Class>.json snapshot
+    JOURNAL_MAX_SIZE = 1 << 20
+
+    # None writes every change through to the journal; a number of
+    # seconds enables write-behind: changes are buffered and flushed by
+    # a background thread at that interval, or sooner once FLUSH_MAX_DIRTY
+    # objects are pending. Buffered changes are lost on a crash.
+    FLUSH_INTERVAL = float(getenv("MODELS_FLUSH_INTERVAL")) \
+        if getenv("MODELS_FLUSH_INTERVAL") else None
+    FLUSH_MAX_DIRTY = 1000
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
@@ -22,18 +114,90 @@ class Base():
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
+            self.__class__.build_indexes()
 
-        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.id = kwargs.get('id') or str(uuid.uuid4())
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = datetime.fromisoformat(kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = datetime.fromisoformat(kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
+        self._version = kwargs.get('_version') or 0
+
+    @classmethod
+    def from_json(cls, obj_json: dict) -> TypeVar('Base'):
+        """ Rebuild an object from its to_json(True) dictionary
+
+        Skips __init__: the attributes are set directly, timestamps
+        parsed with fromisoformat, and no default value is generated.
+        Attributes missing from obj_json are set to None
+        """
+        serializer = _serializer(cls)
+        obj = cls.__new__(cls)
+        set_attr = object.__setattr__
+        get = obj_json.get
+        for name in serializer.fields:
+            set_attr(obj, name, get(name))
+        for name in serializer.timestamps:
+            value = get(name)
+            set_attr(obj, name, datetime.fromisoformat(value)
+                     if value is not None else datetime.utcnow())
+        return obj
+
+    def __setattr__(self, name: str, value) -> None:
+        """ Set an attribute, keeping its index up to date
+        """
+        if name in self.INDEXED_ATTRIBUTES and self._is_stored():
+            self._unindex(name)
+            super().__setattr__(name, value)
+            self._index(name)
+        else:
+            super().__setattr__(name, value)
+
+    def _is_stored(self) -> bool:
+        """ True if this object is the one stored under its ID
+        """
+        objs = DATA.get(self.__class__.__name__)
+        return objs is not None and \
+            objs.get(getattr(self, 'id', None)) is self
+
+    def _index(self, name: str) -> None:
+        """ Add this object to the index of one attribute
+        """
+        index = INDEXES[self.__class__.__name__][name]
+        index.setdefault(getattr(self, name, None), set()).add(self.id)
+
+    def _unindex(self, name: str) -> None:
+        """ Remove this object from the index of one attribute
+        """
+        index = INDEXES[self.__class__.__name__][name]
+        value = getattr(self, name, None)
+        ids = index.get(value)
+        if ids is not None:
+            ids.discard(self.id)
+            if not ids:
+                del index[value]
+
+    @classmethod
+    def build_indexes(cls):
+        """ Rebuild every index from the stored objects
+        """
+        s_class = cls.__name__
+        INDEXES[s_class] = {name: {} for name in cls.INDEXED_ATTRIBUTES}
+        objs = DATA.get(s_class, {})
+        ORDERS[s_class] = SortedIds(objs)
+        for name in cls.INDEXED_ATTRIBUTES:
+            index = INDEXES[s_class][name]
+            if isinstance(objs, LazyObjects):
+                values = objs.attribute_values(name)
+            else:
+                values = ((obj_id, getattr(obj, name, None))
+                          for obj_id, obj in objs.items())
+            for obj_id, value in values:
+                index.setdefault(value, set()).add(obj_id)
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -46,60 +210,267 @@ class Base():
 
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
+
+        Timestamps are formatted once and reused until they change
         """
-        result = {}
-        for key, value in self.__dict__.items():
-            if not for_serialization and key[0] == '_':
-                continue
-            if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
-            else:
-                result[key] = value
+        serializer = _serializer(self.__class__)
+        if for_serialization:
+            result = dict(zip(serializer.fields,
+                              serializer.get_fields(self)))
+        else:
+            result = dict(zip(serializer.public,
+                              serializer.get_public(self)))
+
+        timestamps = serializer.get_timestamps(self)
+        cache = getattr(self, '_json_cache', None)
+        if cache is None or cache[0] != timestamps:
+            cache = (timestamps, tuple(
+                value.strftime(TIMESTAMP_FORMAT) if value is not None
+                else None for value in timestamps))
+            object.__setattr__(self, '_json_cache', cache)
+        result.update(zip(serializer.timestamps, cache[1]))
         return result
 
+    def to_json_str(self) -> str:
+        """ Return to_json() encoded as a JSON string
+        """
+        return json.dumps(self.to_json())
+
+    @classmethod
+    def journal(cls) -> Journal:
+        """ Return the change journal of this class
+        """
+        s_class = cls.__name__
+        journal = JOURNALS.get(s_class)
+        if journal is None:
+            journal = JOURNALS.setdefault(
+                s_class, Journal(".db_{}.journal".format(s_class)))
+        return journal
+
     @classmethod
-    def load_from_file(cls):
+    def load_from_file(cls, stream: bool = False):
         """ Load all objects from file
+
+        Reads the snapshot, then replays the journal over it. With
+        stream, the snapshot is parsed one object at a time instead of
+        being loaded whole, which bounds the parsing memory.
+
+        When LAZY_CACHE_SIZE is set, records stay parsed JSON and
+        objects are only built when get or search return them
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        cls.flush()
+        if cls.LAZY_CACHE_SIZE > 0:
+            DATA[s_class] = LazyObjects(cls.from_json,
+                                        cache_size=cls.LAZY_CACHE_SIZE)
+
+            def from_json(obj_json):
+                return obj_json
+        else:
+            DATA[s_class] = {}
+            from_json = cls.from_json
+        objs = DATA[s_class]
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        if path.exists(file_path):
+            with open(file_path, 'r') as f:
+                if stream:
+                    for obj_id, obj_json in _iter_json_items(f):
+                        objs[obj_id] = from_json(obj_json)
+                else:
+                    for obj_id, obj_json in json.load(f).items():
+                        objs[obj_id] = from_json(obj_json)
+
+        for obj_id, obj_json in cls.journal().entries():
+            if obj_json is None:
+                objs.pop(obj_id, None)
+            else:
+                objs[obj_id] = from_json(obj_json)
+        cls.build_indexes()
+        cls._touch(None)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
+
+        Writes a full snapshot and drops the journal it now contains
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        cls.flush()
+        journal = cls.journal()
+        with journal.snapshot_lock:
+            rotated = journal.rotate()
+            objs = DATA[s_class]
+            if isinstance(objs, LazyObjects):
+                objs_json = objs.to_json()
+            else:
+                objs_json = {}
+                for obj_id, obj in dict(objs).items():
+                    objs_json[obj_id] = obj.to_json(True)
+
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(objs_json, f)
+            os.replace(tmp_path, file_path)
+            if rotated:
+                journal.discard_rotated()
+
+    @classmethod
+    def compact(cls):
+        """ Fold the journal into the snapshot in a background thread
+        """
+        journal = cls.journal()
+        with journal.lock:
+            if journal.compacting:
+                return
+            journal.compacting = True
+
+        def _compact():
+            try:
+                cls.save_to_file()
+            finally:
+                journal.compacting = False
+        threading.Thread(target=_compact, name="compact-{}".format(
+            cls.__name__)).start()
+
+    @classmethod
+    def _log_change(cls, obj_id: str, obj: TypeVar('Base') = None):
+        """ Journal the new state of an object, None if removed
+
+        In write-behind or bulk mode the change is only marked dirty
+        """
+        if cls.FLUSH_INTERVAL is None and not BULK.get(cls):
+            cls._write_changes([(obj_id, obj)])
+            return
+
+        with _dirty_lock:
+            dirty = DIRTY.setdefault(cls, {})
+            dirty[obj_id] = obj
+            count = len(dirty)
+        if cls.FLUSH_INTERVAL is None:
+            if count >= cls.FLUSH_MAX_DIRTY:
+                cls.flush()
+            return
+        _start_flusher(cls.FLUSH_INTERVAL)
+        if count >= cls.FLUSH_MAX_DIRTY:
+            _flush_wakeup.set()
+
+    @classmethod
+    def _write_changes(cls, changes: list):
+        """ Serialize and journal (id, obj) changes, compacting
+        the journal if it grew too large
+        """
+        journal = cls.journal()
+        journal.append_many([
+            (obj_id, obj.to_json(True) if obj is not None else None)
+            for obj_id, obj in changes])
+        if journal.size > cls.JOURNAL_MAX_SIZE:
+            cls.compact()
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def flush(cls):
+        """ Write the pending changes of this class, or of every class
+        when called on Base
+        """
+        with _dirty_lock:
+            if cls is Base:
+                pending = list(DIRTY.items())
+                DIRTY.clear()
+            else:
+                pending = [(cls, DIRTY.pop(cls, {}))]
+        for klass, dirty in pending:
+            if dirty:
+                klass._write_changes(list(dirty.items()))
+
+    @classmethod
+    @contextmanager
+    def bulk(cls):
+        """ Buffer every change of this class made inside the block,
+        from any thread, and write them at once when it exits
+        """
+        with _dirty_lock:
+            BULK[cls] = BULK.get(cls, 0) + 1
+        try:
+            yield cls
+        finally:
+            with _dirty_lock:
+                BULK[cls] -= 1
+            cls.flush()
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self._version = (self._version or 0) + 1
+        if not self._is_stored():
+            previous = DATA[s_class].get(self.id)
+            if previous is not None:
+                previous.remove_from_indexes()
+            else:
+                ORDERS[s_class].add(self.id)
+            DATA[s_class][self.id] = self
+            for name in self.INDEXED_ATTRIBUTES:
+                self._index(name)
+        self.__class__._touch(self.id)
+        self.__class__._log_change(self.id, self)
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        obj = DATA[s_class].get(self.id)
+        if obj is not None:
+            obj.remove_from_indexes()
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            ORDERS[s_class].discard(self.id)
+            self.__class__._touch(self.id)
+            self.__class__._log_change(self.id)
+
+    @classmethod
+    def _touch(cls, obj_id: str = None):
+        """ Record a change in the collection of this class and notify
+        its subscribers
+        """
+        s_class = cls.__name__
+        VERSIONS[s_class] = VERSIONS.get(s_class, 0) + 1
+        LAST_MODIFIED[s_class] = datetime.utcnow()
+        for callback in SUBSCRIBERS.get(s_class, ()):
+            callback(obj_id)
+
+    @classmethod
+    def subscribe(cls, callback):
+        """ Call callback(obj_id) after every save or remove of an
+        object of this class, callback(None) when the class is reloaded
+        """
+        SUBSCRIBERS.setdefault(cls.__name__, []).append(callback)
+
+    @property
+    def etag(self) -> str:
+        """ Entity tag (unquoted) of the saved version of this object
+        """
+        return "{}-{}".format(self.id, self._version or 0)
+
+    @classmethod
+    def collection_etag(cls, variant: str = "") -> str:
+        """ Entity tag (unquoted) of the current set of stored objects,
+        variant telling apart representations of the same set
+        """
+        return "{}-{}-{}{}".format(cls.__name__, BOOT_ID,
+                                   VERSIONS.get(cls.__name__, 0), variant)
+
+    @classmethod
+    def last_modified(cls) -> datetime:
+        """ UTC time of the last change of the stored objects
+        """
+        return LAST_MODIFIED.get(cls.__name__)
+
+    def remove_from_indexes(self):
+        """ Drop this object from every index of its class
+        """
+        for name in self.INDEXED_ATTRIBUTES:
+            self._unindex(name)
 
     @classmethod
     def count(cls) -> int:
@@ -122,10 +493,22 @@ class Base():
         return DATA[s_class].get(id)
 
     @classmethod
-    def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
-        """ Search all objects with matching attributes
+    def _indexed_ids(cls, attributes: dict) -> List[str]:
+        """ IDs matching the first indexed attribute of the query,
+        None if no index applies
+        """
+        for k, v in attributes.items():
+            if k in cls.INDEXED_ATTRIBUTES:
+                try:
+                    return list(INDEXES[cls.__name__][k].get(v, ()))
+                except TypeError:
+                    continue
+        return None
+
+    @staticmethod
+    def _matcher(attributes: dict):
+        """ Return a predicate checking every attribute of the query
         """
-        s_class = cls.__name__
         def _search(obj):
             if len(attributes) == 0:
                 return True
@@ -133,5 +516,142 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+        return _search
+
+    @classmethod
+    def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes
+
+        Uses the index of the first indexed attribute of the query,
+        if any, instead of scanning every object
+        """
+        s_class = cls.__name__
+        objs = DATA[s_class].values()
+        ids = cls._indexed_ids(attributes)
+        if ids is not None:
+            objs = filter(None, map(DATA[s_class].get, ids))
+
+        return list(filter(cls._matcher(attributes), objs))
+
+    @classmethod
+    def iter_search(cls, attributes: dict = {},
+                    after: str = None) -> Iterator[TypeVar('Base')]:
+        """ Yield the objects with matching attributes whose ID sorts
+        after `after`, in ID order
+
+        The sorted ID list (or an index) is walked as objects are
+        consumed, so the first ones come out before the rest is read
+        """
+        s_class = cls.__name__
+        objs = DATA[s_class]
+        matches = cls._matcher(attributes)
+        ids = cls._indexed_ids(attributes)
+        if ids is not None:
+            ids = sorted(obj_id for obj_id in ids
+                         if after is None or obj_id > after)
+        else:
+            ids = cls._ids_after(after)
+
+        for obj_id in ids:
+            obj = objs.get(obj_id)
+            if obj is not None and matches(obj):
+                yield obj
+
+    @classmethod
+    def _ids_after(cls, after: str = None,
+                   chunk_size: int = 256) -> Iterator[str]:
+        """ Yield the stored IDs sorting after `after`, in order, a
+        chunk at a time so objects saved or removed meanwhile don't
+        shift the walk
+        """
+        order = ORDERS[cls.__name__]
+        while True:
+            chunk = order.after(after, chunk_size)
+            if not chunk:
+                return
+            yield from chunk
+            after = chunk[-1]
+
+    @classmethod
+    def search_page(cls, attributes: dict = {}, limit: int = None,
+                    after: str = None) -> List[TypeVar('Base')]:
+        """ Search objects with matching attributes in ID order
+
+        Returns at most limit objects whose ID sorts after `after`,
+        walking the sorted ID list (or an index) only as far as needed
+        to fill the page
+        """
+        return list(islice(cls.iter_search(attributes, after), limit))
+
+    @classmethod
+    def public_attributes(cls) -> tuple:
+        """ Names of the attributes returned by to_json()
+        """
+        return _serializer(cls).public
+
+
+_JSON_SEPARATOR = re.compile(r'[\s,]*')
+_JSON_COLON = re.compile(r'\s*:\s*')
+
+
+def _iter_json_items(f, chunk_size: int = 1 << 16) -> Iterable[tuple]:
+    """ Yield the (key, value) pairs of the JSON object stored in f,
+    reading it chunk by chunk
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        pos = _JSON_SEPARATOR.match(buf, pos).end()
+        try:
+            if not started:
+                if buf[pos] != '{':
+                    raise json.JSONDecodeError("Expecting '{'", buf, pos)
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == '}':
+                return
+            key, end = decoder.raw_decode(buf, pos)
+            colon = _JSON_COLON.match(buf, end)
+            if colon is None:
+                raise json.JSONDecodeError("Expecting ':'", buf, end)
+            value, end = decoder.raw_decode(buf, colon.end())
+        except (IndexError, ValueError):
+            if eof:
+                raise json.JSONDecodeError("Truncated JSON object", buf, pos)
+            more = f.read(chunk_size)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        yield key, value
+        pos = end
+
+
+def _start_flusher(interval: float):
+    """ Make sure the write-behind thread runs at least every
+    interval seconds
+    """
+    global _flusher
+    with _dirty_lock:
+        if interval in _flush_intervals:
+            return
+        _flush_intervals.add(interval)
+        if _flusher is not None:
+            _flush_wakeup.set()
+            return
+
+        def _run():
+            while True:
+                _flush_wakeup.wait(min(_flush_intervals))
+                _flush_wakeup.clear()
+                Base.flush()
+        _flusher = threading.Thread(target=_run, name="models-flusher",
+                                    daemon=True)
+        _flusher.start()
+
+
+atexit.register(Base.flush)
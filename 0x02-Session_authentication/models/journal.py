@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+""" Journal module
+"""
+from typing import Iterator
+from os import path
+import json
+import os
+import shutil
+import threading
+
+
+class Journal():
+    """ Append-only JSON Lines log of object changes
+
+    Each line is {"id": ..., "obj": {...}} for a saved object or
+    {"id": ..., "obj": null} for a removed one. Replaying the lines in
+    order over a snapshot is idempotent: the last line of an ID always
+    holds its latest state.
+    """
+
+    def __init__(self, file_path: str):
+        """ Initialize a Journal writing to file_path
+        """
+        self.file_path = file_path
+        self.rotated_path = file_path + ".1"
+        self.lock = threading.RLock()
+        self.snapshot_lock = threading.Lock()
+        self.compacting = False
+        self._file = None
+
+    @property
+    def size(self) -> int:
+        """ Size in bytes of the current journal file
+        """
+        with self.lock:
+            if self._file is not None:
+                return self._file.tell()
+        return path.getsize(self.file_path) \
+            if path.exists(self.file_path) else 0
+
+    def append(self, obj_id: str, obj_json: dict = None):
+        """ Record the new state of an object, None if removed
+        """
+        self.append_many([(obj_id, obj_json)])
+
+    def append_many(self, changes: list):
+        """ Record several (id, obj_json) changes with a single flush
+        """
+        lines = "".join(json.dumps({"id": obj_id, "obj": obj_json}) + "\n"
+                        for obj_id, obj_json in changes)
+        with self.lock:
+            if self._file is None:
+                self._file = open(self.file_path, 'a')
+            self._file.write(lines)
+            self._file.flush()
+
+    def rotate(self) -> bool:
+        """ Move the current journal aside so a snapshot can absorb it
+
+        A rotated journal left by a crash before its snapshot was
+        written gets the current journal appended instead, so replaying
+        it still yields every change in order. Returns True
+        """
+        with self.lock:
+            self.close()
+            if not path.exists(self.file_path):
+                return True
+            if path.exists(self.rotated_path):
+                with open(self.rotated_path, 'rb+') as rotated, \
+                        open(self.file_path, 'rb') as current:
+                    # end a torn last line so it can't swallow the next
+                    if rotated.seek(0, os.SEEK_END) > 0:
+                        rotated.seek(-1, os.SEEK_END)
+                        if rotated.read(1) != b"\n":
+                            rotated.write(b"\n")
+                    shutil.copyfileobj(current, rotated)
+                    rotated.flush()
+                    os.fsync(rotated.fileno())
+                os.remove(self.file_path)
+            else:
+                os.replace(self.file_path, self.rotated_path)
+            return True
+
+    def discard_rotated(self):
+        """ Delete the rotated journal once its snapshot is written
+        """
+        with self.lock:
+            if path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+
+    def entries(self) -> Iterator[tuple]:
+        """ Yield (id, obj_json) from the rotated then current journal
+
+        A torn last line, left by a crash mid-write, is skipped
+        """
+        for file_path in (self.rotated_path, self.file_path):
+            if not path.exists(file_path):
+                continue
+            with open(file_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    yield entry["id"], entry["obj"]
+
+    def close(self):
+        """ Close the journal file
+        """
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
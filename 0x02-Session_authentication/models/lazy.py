@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+""" Lazy object store module
+"""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Callable, Iterable, Iterator
+from weakref import WeakValueDictionary
+import threading
+
+
+class LazyObjects(MutableMapping):
+    """ Mapping of ID to object that keeps records as parsed JSON
+    dictionaries and only builds objects when they are accessed
+
+    At most `cache_size` objects are held: the least recently used one
+    is turned back into its JSON dictionary when the cache is full.
+    Objects still referenced elsewhere stay reachable by ID, so a
+    record never has two live copies. Keep a reference and save() it
+    to make a change durable.
+
+    Only the startup time improves: every record stays in memory as
+    its parsed dictionary, which takes about as much as the object.
+    """
+
+    def __init__(self, from_json: Callable, records: dict = None,
+                 cache_size: int = 1000):
+        """ Initialize with the {id: obj_json} records of a class
+        """
+        self.from_json = from_json
+        self.cache_size = cache_size
+        self._items = records if records is not None else {}
+        self._cache = OrderedDict()
+        # objects evicted from the cache but still referenced
+        self._live = WeakValueDictionary()
+        self._lock = threading.RLock()
+
+    def __getitem__(self, obj_id: str):
+        with self._lock:
+            item = self._items[obj_id]
+            if obj_id in self._cache:
+                self._cache.move_to_end(obj_id)
+                return item
+            if isinstance(item, dict):
+                obj = self._live.get(obj_id)
+                item = obj if obj is not None else self.from_json(item)
+                self._items[obj_id] = item
+            self._remember(obj_id)
+            return item
+
+    def __setitem__(self, obj_id: str, obj):
+        with self._lock:
+            self._items[obj_id] = obj
+            self._live.pop(obj_id, None)
+            if isinstance(obj, dict):
+                self._cache.pop(obj_id, None)
+            else:
+                self._remember(obj_id)
+
+    def __delitem__(self, obj_id: str):
+        with self._lock:
+            del self._items[obj_id]
+            self._cache.pop(obj_id, None)
+            self._live.pop(obj_id, None)
+
+    def __contains__(self, obj_id) -> bool:
+        return obj_id in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._items))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _remember(self, obj_id: str):
+        """ Mark an object as recently used, evicting the oldest one
+        """
+        self._cache[obj_id] = None
+        self._cache.move_to_end(obj_id)
+        while len(self._cache) > self.cache_size:
+            old_id, _ = self._cache.popitem(last=False)
+            obj = self._items.get(old_id)
+            if obj is not None and not isinstance(obj, dict):
+                self._items[old_id] = obj.to_json(True)
+                self._live[old_id] = obj
+
+    def _current(self, obj_id: str, item):
+        """ The live object of a record if there is one, else the item
+        """
+        if isinstance(item, dict):
+            return self._live.get(obj_id, item)
+        return item
+
+    @property
+    def materialized(self) -> int:
+        """ Number of objects currently built
+        """
+        return len(self._cache)
+
+    def attribute_values(self, name: str) -> Iterable[tuple]:
+        """ Yield (id, value) of one attribute without building objects
+        """
+        for obj_id, item in list(self._items.items()):
+            item = self._current(obj_id, item)
+            if isinstance(item, dict):
+                yield obj_id, item.get(name)
+            else:
+                yield obj_id, getattr(item, name, None)
+
+    def to_json(self) -> dict:
+        """ Return {id: obj_json} for every record
+        """
+        with self._lock:
+            items = {obj_id: self._current(obj_id, item)
+                     for obj_id, item in self._items.items()}
+        return {obj_id: item if isinstance(item, dict) else
+                item.to_json(True) for obj_id, item in items.items()}
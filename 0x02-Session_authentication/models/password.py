@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+""" Password hashing module
+"""
+from abc import ABC, abstractmethod
+from models.ttl_cache import TTLCache
+from os import getenv
+import base64
+import hashlib
+import hmac
+import os
+import threading
+
+
+def _b64(data: bytes) -> str:
+    """ Unpadded base64 of bytes """
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text: str) -> bytes:
+    """ Bytes of an unpadded base64 string """
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class PasswordHasher(ABC):
+    """ Key derivation function storing passwords as
+    `<NAME>$<parameters>$<salt>$<hash>`
+    """
+    NAME = None
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        """ Hash a password with a fresh salt """
+
+    @abstractmethod
+    def verify(self, password: str, hashed: str) -> bool:
+        """ Check a password against its hash in constant time """
+
+    def identifies(self, hashed: str) -> bool:
+        """ True if the hash was made by this hasher """
+        return hashed.startswith(self.NAME + '$')
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """ True if the hash was made with other parameters """
+        return False
+
+
+class PBKDF2Hasher(PasswordHasher):
+    """ PBKDF2-HMAC-SHA256 from hashlib """
+    NAME = 'pbkdf2_sha256'
+
+    def __init__(self, iterations: int = 600000):
+        """ Use the given number of iterations """
+        self.iterations = iterations
+
+    def _derive(self, password: str, salt: bytes, iterations: int) -> bytes:
+        """ Derive the key of a password """
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt,
+                                   iterations)
+
+    def hash(self, password: str) -> str:
+        """ Hash a password with a fresh salt """
+        salt = os.urandom(16)
+        return '$'.join((self.NAME, str(self.iterations), _b64(salt),
+                         _b64(self._derive(password, salt,
+                                           self.iterations))))
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """ Check a password against its hash in constant time """
+        _, iterations, salt, digest = hashed.split('$')
+        return hmac.compare_digest(
+            self._derive(password, _unb64(salt), int(iterations)),
+            _unb64(digest))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """ True if the hash was made with other parameters """
+        return int(hashed.split('$')[1]) != self.iterations
+
+
+class ScryptHasher(PasswordHasher):
+    """ scrypt from hashlib """
+    NAME = 'scrypt'
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        """ Use the given cost parameters """
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int,
+                p: int) -> bytes:
+        """ Derive the key of a password """
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r, dklen=32)
+
+    def hash(self, password: str) -> str:
+        """ Hash a password with a fresh salt """
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return '$'.join((self.NAME, str(self.n), str(self.r), str(self.p),
+                         _b64(salt), _b64(digest)))
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """ Check a password against its hash in constant time """
+        _, n, r, p, salt, digest = hashed.split('$')
+        return hmac.compare_digest(
+            self._derive(password, _unb64(salt), int(n), int(r), int(p)),
+            _unb64(digest))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """ True if the hash was made with other parameters """
+        return hashed.split('$')[1:4] != [str(self.n), str(self.r),
+                                          str(self.p)]
+
+
+class BcryptHasher(PasswordHasher):
+    """ bcrypt, stored in its own `$2b$<cost>$...` format; needs the
+    bcrypt package
+    """
+    NAME = 'bcrypt'
+
+    def __init__(self, rounds: int = 12):
+        """ Use the given cost """
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        """ Hash a password with a fresh salt """
+        import bcrypt
+        return bcrypt.hashpw(password.encode(),
+                             bcrypt.gensalt(self.rounds)).decode('ascii')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """ Check a password against its hash in constant time """
+        import bcrypt
+        return bcrypt.checkpw(password.encode(), hashed.encode('ascii'))
+
+    def identifies(self, hashed: str) -> bool:
+        """ True if the hash was made by this hasher """
+        return hashed.startswith('$2')
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """ True if the hash was made with other parameters """
+        return int(hashed.split('$')[2]) != self.rounds
+
+
+class SHA256Hasher(PasswordHasher):
+    """ Unsalted SHA256 hex digest of the first User model, only kept
+    to verify old records
+    """
+    NAME = 'sha256'
+
+    def hash(self, password: str) -> str:
+        """ Hash a password, unsalted """
+        return hashlib.sha256(password.encode()).hexdigest().lower()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """ Check a password against its hash in constant time """
+        return hmac.compare_digest(self.hash(password), hashed)
+
+    def identifies(self, hashed: str) -> bool:
+        """ True if the hash was made by this hasher """
+        return len(hashed) == 64 and '$' not in hashed
+
+
+HASHERS = {
+    PBKDF2Hasher.NAME: lambda: PBKDF2Hasher(
+        int(getenv("PASSWORD_PBKDF2_ITERATIONS", 600000))),
+    ScryptHasher.NAME: lambda: ScryptHasher(
+        int(getenv("PASSWORD_SCRYPT_N", 2 ** 14))),
+    BcryptHasher.NAME: lambda: BcryptHasher(
+        int(getenv("PASSWORD_BCRYPT_ROUNDS", 12))),
+    SHA256Hasher.NAME: SHA256Hasher,
+}
+
+
+_hashers = {}
+_hashers_lock = threading.Lock()
+# (hash, password) pairs already verified
+memo = TTLCache(int(getenv("PASSWORD_MEMO_SIZE", 1024)),
+                float(getenv("PASSWORD_MEMO_TTL", 300)))
+
+
+def get_hasher(name: str = None) -> PasswordHasher:
+    """ Hasher of a name, PASSWORD_HASHER (pbkdf2_sha256 by default)
+    when None
+    """
+    if name is None:
+        name = getenv("PASSWORD_HASHER", PBKDF2Hasher.NAME)
+    with _hashers_lock:
+        if name not in _hashers:
+            if name not in HASHERS:
+                raise ValueError("unknown password hasher: {}".format(name))
+            _hashers[name] = HASHERS[name]()
+        return _hashers[name]
+
+
+def _identify(hashed: str) -> PasswordHasher:
+    """ Hasher that made a hash, None if none did """
+    for name in HASHERS:
+        hasher = get_hasher(name)
+        if hasher.identifies(hashed):
+            return hasher
+    return None
+
+
+def hash_password(password: str) -> str:
+    """ Hash a password with the configured hasher """
+    return get_hasher().hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """ Check a password against a hash made by any hasher; a pair
+    verified within PASSWORD_MEMO_TTL seconds is not hashed again
+    """
+    key = memo.digest(hashed, password) if memo.max_size > 0 else None
+    if key is not None and memo.get(key):
+        return True
+    hasher = _identify(hashed)
+    if hasher is None:
+        return False
+    try:
+        valid = hasher.verify(password, hashed)
+    except ValueError:
+        return False
+    if valid and key is not None:
+        memo.put(key, True)
+    return valid
+
+
+def needs_rehash(hashed: str) -> bool:
+    """ True if a hash was not made by the configured hasher with its
+    current parameters
+    """
+    hasher = get_hasher()
+    return not hasher.identifies(hashed) or hasher.needs_rehash(hashed)
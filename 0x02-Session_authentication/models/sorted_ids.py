@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+""" Sorted ID list module
+"""
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List
+import threading
+
+
+class SortedIds():
+    """ Sorted set of IDs kept as a list of sorted chunks
+
+    A chunk holds at most 2 * `load` IDs and is split in two beyond
+    that, so adding or removing an ID only moves the IDs of one chunk
+    and the chunk maxima instead of the whole list.
+    """
+
+    def __init__(self, ids: Iterable[str] = (), load: int = 1000):
+        """ Initialize with the given IDs, in any order
+        """
+        self.load = load
+        ids = sorted(ids)
+        self._chunks = [ids[i:i + load] for i in range(0, len(ids), load)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(ids)
+        self._lock = threading.Lock()
+
+    def add(self, obj_id: str) -> None:
+        """ Insert an ID, if not already there
+        """
+        with self._lock:
+            if not self._chunks:
+                self._chunks.append([obj_id])
+                self._maxes.append(obj_id)
+                self._len = 1
+                return
+            i = min(bisect_left(self._maxes, obj_id), len(self._maxes) - 1)
+            chunk = self._chunks[i]
+            j = bisect_left(chunk, obj_id)
+            if j < len(chunk) and chunk[j] == obj_id:
+                return
+            chunk.insert(j, obj_id)
+            self._maxes[i] = chunk[-1]
+            self._len += 1
+            if len(chunk) > 2 * self.load:
+                half = chunk[self.load:]
+                del chunk[self.load:]
+                self._chunks.insert(i + 1, half)
+                self._maxes[i] = chunk[-1]
+                self._maxes.insert(i + 1, half[-1])
+
+    def discard(self, obj_id: str) -> None:
+        """ Remove an ID, if there
+        """
+        with self._lock:
+            i = bisect_left(self._maxes, obj_id)
+            if i == len(self._maxes):
+                return
+            chunk = self._chunks[i]
+            j = bisect_left(chunk, obj_id)
+            if j == len(chunk) or chunk[j] != obj_id:
+                return
+            del chunk[j]
+            self._len -= 1
+            if chunk:
+                self._maxes[i] = chunk[-1]
+            else:
+                del self._chunks[i]
+                del self._maxes[i]
+
+    def after(self, obj_id: str = None, count: int = 256) -> List[str]:
+        """ Return up to `count` IDs sorting after obj_id, in order;
+        the first ones when obj_id is None
+        """
+        result = []
+        with self._lock:
+            i = 0 if obj_id is None else bisect_right(self._maxes, obj_id)
+            if i < len(self._chunks):
+                chunk = self._chunks[i]
+                j = 0 if obj_id is None else bisect_right(chunk, obj_id)
+                result.extend(chunk[j:j + count])
+                i += 1
+            while len(result) < count and i < len(self._chunks):
+                result.extend(self._chunks[i][:count - len(result)])
+                i += 1
+        return result
+
+    def __contains__(self, obj_id) -> bool:
+        with self._lock:
+            i = bisect_left(self._maxes, obj_id)
+            if i == len(self._maxes):
+                return False
+            chunk = self._chunks[i]
+            j = bisect_left(chunk, obj_id)
+            return j < len(chunk) and chunk[j] == obj_id
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            chunks = [list(chunk) for chunk in self._chunks]
+        for chunk in chunks:
+            yield from chunk
+
+    def __len__(self) -> int:
+        return self._len
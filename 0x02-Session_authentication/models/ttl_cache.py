@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+""" TTL cache module
+"""
+from collections import OrderedDict
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+
+class TTLCache():
+    """ Bounded LRU map whose entries expire ttl seconds after they
+    are put
+
+    Meant for keys derived from secrets: digest() turns them into an
+    HMAC under a random per-process key, so the secrets themselves are
+    never kept in memory. A max_size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        """ Initialize a cache of at most max_size entries, each valid
+        for ttl seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, *parts: str) -> bytes:
+        """ Keyed hash of one or more strings, usable as a key """
+        return hmac.new(self._key, b'\0'.join(part.encode('utf-8')
+                                              for part in parts),
+                        hashlib.sha256).digest()
+
+    def get(self, key: bytes, default=None):
+        """ Return the value of a key put less than ttl seconds ago,
+        default otherwise
+        """
+        if self.max_size <= 0:
+            return default
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, value) -> list:
+        """ Set the value of a key, return the (key, value) pairs
+        evicted to make room
+        """
+        if self.max_size <= 0:
+            return []
+        evicted = []
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                evicted.append((old_key, old_value))
+            self.evictions += len(evicted)
+        return evicted
+
+    def pop(self, key: bytes, default=None):
+        """ Remove a key and return its value, default if absent """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """ Remove every entry """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """ Fraction of lookups answered from the cache """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
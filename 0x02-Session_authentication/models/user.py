@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 """ User module
 """
-import hashlib
 from models.base import Base
+from models.password import hash_password, needs_rehash, verify_password
 
 
 class User(Base):
     """ User class
     """
+    __slots__ = ('email', '_password', 'first_name', 'last_name')
+
+    INDEXED_ATTRIBUTES = ('email',)
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -26,22 +29,33 @@ class User(Base):
 
     @password.setter
     def password(self, pwd: str):
-        """ Setter of a new password: encrypt in SHA256
+        """ Setter of a new password: hash it with the PASSWORD_HASHER
+        key derivation function
         """
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = hash_password(pwd)
 
     def is_valid_password(self, pwd: str) -> bool:
-        """ Validate a password
+        """ Validate a password, hashing it again with the current
+        PASSWORD_HASHER settings when it was stored with other ones
         """
         if pwd is None or type(pwd) is not str:
             return False
-        if self.password is None:
+        hashed = self.password
+        if hashed is None:
+            return False
+        if not verify_password(pwd, hashed):
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        if needs_rehash(hashed):
+            rehashed = hash_password(pwd)
+            # leave a password changed during the check alone
+            if self.password == hashed:
+                self._password = rehashed
+                if self._is_stored():
+                    self.save()
+        return True
 
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
@@ -8,6 +8,12 @@ app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.teardown_appcontext
+def teardown_db(exception) -> None:
+    """ Release the database session of the request """
+    AUTH.teardown()
+
+
 @app.route("/", methods=['GET'], strict_slashes=False)
 def basic() -> str:
     """ route function
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """ Authentication Model """
-import bcrypt
 from db import DB
+from hashing_service import get_hashing_service
 from user import User
 from uuid import uuid4
 from sqlalchemy.orm.exc import NoResultFound
@@ -10,9 +10,7 @@ from typing import Union
 
 def _hash_password(password: str) -> bytes:
     """ A method to encrypt a password """
-    salt = bcrypt.gensalt()
-    hash_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hash_password
+    return get_hashing_service().hash_password(password)
 
 
 def _generate_uuid() -> str:
@@ -45,15 +43,46 @@ class Auth:
 
     def valid_login(self, email: str, password: str) -> bool:
         """ A function that validates that every login user
-         is valid hashed password"""
+         is valid hashed password
+
+         A password hashed with an outdated bcrypt cost is hashed
+         again in the background and stored by the hashing worker """
         try:
             user = self._db.find_user_by(email=email)
         except NoResultFound:
             return False
 
         hashed_password = user.hashed_password
+        service = get_hashing_service()
+
+        if not service.is_valid(hashed_password, password):
+            return False
 
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+        user_id = user.id
+        service.rehash_if_needed(
+            hashed_password, password,
+            lambda new_hash: self._store_rehash(user_id, hashed_password,
+                                                new_hash))
+        return True
+
+    def _store_rehash(self, user_id: int, old_hash: bytes,
+                      new_hash: bytes) -> None:
+        """ Replace a password hash by its upgraded version, unless the
+         password changed in the meantime. Runs on a hashing worker,
+         in the database session of that thread, released after """
+        try:
+            user = self._db.find_user_by(id=user_id)
+            if user.hashed_password == old_hash:
+                self._db.update_user(user_id, hashed_password=new_hash)
+        except (NoResultFound, ValueError):
+            pass
+        finally:
+            self._db.remove_session()
+
+    def teardown(self) -> None:
+        """ Release the database session of the current thread,
+         at the end of each request """
+        self._db.remove_session()
 
     def create_session(self, email: str) -> str:
         """ A fuction that creates a login a unique
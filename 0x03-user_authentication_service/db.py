@@ -1,29 +1,76 @@
 #!/usr/bin/env python3
 """ Database for sqlalchemy ORM """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from os import getenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.pool import QueuePool
 from user import Base, User
 
 
-class DB:
-    """ DB Class for Object Reational Mapping """
+def _engine_options(url: str) -> dict:
+    """ create_engine options from the environment:
+     DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT and
+     DB_POOL_RECYCLE size a QueuePool when DB_POOL_SIZE is set """
+    options = {}
+    if make_url(url).get_backend_name() == "sqlite":
+        # connections move between threads through the pool, each one
+        # only used by the thread holding it
+        options["connect_args"] = {"check_same_thread": False}
+    pool_size = getenv("DB_POOL_SIZE")
+    if pool_size:
+        options["poolclass"] = QueuePool
+        options["pool_size"] = int(pool_size)
+        options["max_overflow"] = int(getenv("DB_MAX_OVERFLOW", 10))
+        options["pool_timeout"] = float(getenv("DB_POOL_TIMEOUT", 30))
+        options["pool_recycle"] = int(getenv("DB_POOL_RECYCLE", -1))
+        options["pool_pre_ping"] = True
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """ Let readers run alongside a writer (WAL, unless DB_SQLITE_WAL is
+     0) and make writers wait for the lock instead of failing """
+    cursor = dbapi_connection.cursor()
+    if getenv("DB_SQLITE_WAL", "1") != "0":
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout={}".format(
+        int(getenv("DB_SQLITE_BUSY_TIMEOUT", 5000))))
+    cursor.close()
+
 
-    def __init__(self):
-        """ Constructor Method """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+class DB:
+    """ DB Class for Object Reational Mapping
+
+    Each thread works in its own session, released by remove_session
+    at the end of a request """
+
+    def __init__(self, url: str = None):
+        """ Constructor Method: connect to url, DB_URL or a.db, and
+         empty the database unless DB_RESET is 0 (set it when several
+         worker processes share the database) """
+        url = url or getenv("DB_URL", "sqlite:///a.db")
+        self._engine = create_engine(url, echo=False, **_engine_options(url))
+        if self._engine.dialect.name == "sqlite":
+            event.listen(self._engine, "connect", _set_sqlite_pragmas)
+        if getenv("DB_RESET", "1") != "0":
+            Base.metadata.drop_all(self._engine)
         Base.metadata.create_all(self._engine)
-        self.__session = None
+        self.__session = scoped_session(
+            sessionmaker(bind=self._engine, expire_on_commit=False))
 
     @property
     def _session(self):
-        """ Session Getter Method """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        """ Session Getter Method: the session of the current thread """
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """ Close the session of the current thread, returning its
+         connection to the pool """
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """ A method that adds a user to the database
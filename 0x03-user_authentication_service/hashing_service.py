@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+""" Password Hashing Service """
+import asyncio
+import bcrypt
+import os
+import threading
+import time
+from concurrent.futures import (Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Callable
+
+
+class HashingServiceBusy(Exception):
+    """ Raised when the service queue stays saturated past the timeout """
+
+
+def _hashpw(password: bytes, rounds: int = 12) -> bytes:
+    """ Hash a password with a fresh salt of the given cost """
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    """ Check a password against its hash """
+    return bcrypt.checkpw(password, hashed_password)
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """ Return the cost stored in a bcrypt hash ($2b$<cost>$...) """
+    return int(hashed_password.split(b"$")[2])
+
+
+def calibrate_rounds(target_ms: float = 250.0, min_rounds: int = 10,
+                     max_rounds: int = 16, probe_rounds: int = 8) -> int:
+    """ Pick the highest bcrypt cost hashing within target_ms here
+
+        One hash is timed at `probe_rounds` and extrapolated, each extra
+        round doubling the work. The result never goes below
+        `min_rounds`, even on hardware slower than the target. """
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(probe_rounds))
+    probe_ms = (time.perf_counter() - start) * 1000
+    rounds = probe_rounds
+    while rounds < max_rounds \
+            and probe_ms * 2 ** (rounds + 1 - probe_rounds) <= target_ms:
+        rounds += 1
+    return max(min_rounds, rounds)
+
+
+class HashingService:
+    """ Runs bcrypt on a pool of workers
+
+        bcrypt releases the GIL, so a thread pool is enough to spread
+        hashing across cores; `use_processes` switches to a process
+        pool. At most `max_pending` jobs may be queued or running:
+        submitting more blocks for up to `submit_timeout` seconds (the
+        async methods wait without blocking the event loop), then
+        raises HashingServiceBusy. New hashes use `rounds` as cost. """
+
+    def __init__(self, workers: int = None, max_pending: int = None,
+                 submit_timeout: float = None, use_processes: bool = False,
+                 rounds: int = 12):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.submit_timeout = submit_timeout
+        if use_processes:
+            self._executor = ProcessPoolExecutor(self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _submit(self, fn, *args, blocking: bool = True) -> Future:
+        """ Schedule fn(*args) once a queue slot is free """
+        if not blocking:
+            acquired = self._slots.acquire(blocking=False)
+        elif self.submit_timeout is None:
+            acquired = self._slots.acquire()
+        else:
+            acquired = self._slots.acquire(timeout=self.submit_timeout)
+        if not acquired:
+            raise HashingServiceBusy("too many pending hashing jobs")
+        return self._schedule(fn, *args)
+
+    async def _submit_async(self, fn, *args) -> Future:
+        """ Schedule fn(*args) once a queue slot is free, polling for the
+            slot so a saturated service never blocks the event loop """
+        deadline = None
+        if self.submit_timeout is not None:
+            deadline = time.monotonic() + self.submit_timeout
+        delay = 0.001
+        while not self._slots.acquire(blocking=False):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise HashingServiceBusy("too many pending hashing jobs")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return self._schedule(fn, *args)
+
+    def _schedule(self, fn, *args) -> Future:
+        """ Run fn(*args) in the pool on an already acquired slot """
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submit_hash(self, password: str) -> Future:
+        """ Hash a password in the pool, returning a Future of bytes """
+        return self._submit(_hashpw, password.encode('utf-8'), self.rounds)
+
+    def submit_check(self, hashed_password: bytes, password: str) -> Future:
+        """ Check a password in the pool, returning a Future of bool """
+        return self._submit(_checkpw, password.encode('utf-8'),
+                            hashed_password)
+
+    def hash_password(self, password: str) -> bytes:
+        """ Hash a password, waiting for the result """
+        return self.submit_hash(password).result()
+
+    def is_valid(self, hashed_password: bytes, password: str) -> bool:
+        """ Check a password, waiting for the result """
+        return self.submit_check(hashed_password, password).result()
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        """ Return True if the hash was made with a lower cost """
+        return hash_rounds(hashed_password) < self.rounds
+
+    def rehash_if_needed(self, hashed_password: bytes, password: str,
+                         callback: Callable[[bytes], None]) -> bool:
+        """ Hash an already verified password again in the background
+            when its stored cost is outdated, and pass the new hash to
+            `callback` from a worker thread.
+
+            Nothing is scheduled when the queue is saturated: the next
+            successful login will try again. Returns True if scheduled """
+        if not self.needs_rehash(hashed_password):
+            return False
+        try:
+            future = self._submit(_hashpw, password.encode('utf-8'),
+                                  self.rounds, blocking=False)
+        except HashingServiceBusy:
+            return False
+
+        def done(future: Future) -> None:
+            if future.exception() is None:
+                callback(future.result())
+        future.add_done_callback(done)
+        return True
+
+    async def hash_password_async(self, password: str) -> bytes:
+        """ Awaitable version of hash_password; waiting for a queue
+            slot yields to the event loop """
+        return await asyncio.wrap_future(await self._submit_async(
+            _hashpw, password.encode('utf-8'), self.rounds))
+
+    async def is_valid_async(self, hashed_password: bytes,
+                             password: str) -> bool:
+        """ Awaitable version of is_valid; waiting for a queue slot
+            yields to the event loop """
+        return await asyncio.wrap_future(await self._submit_async(
+            _checkpw, password.encode('utf-8'), hashed_password))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ Stop the workers """
+        self._executor.shutdown(wait=wait)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_hashing_service() -> HashingService:
+    """ Return the process wide service, sized from the BCRYPT_WORKERS
+        and BCRYPT_MAX_PENDING environment variables
+
+        The cost is BCRYPT_ROUNDS when set, otherwise it is calibrated
+        against BCRYPT_TARGET_MS (250ms by default) on first use """
+    global _service
+    with _service_lock:
+        if _service is None:
+            workers = os.getenv("BCRYPT_WORKERS")
+            max_pending = os.getenv("BCRYPT_MAX_PENDING")
+            rounds = os.getenv("BCRYPT_ROUNDS")
+            if rounds:
+                rounds = int(rounds)
+            else:
+                rounds = calibrate_rounds(
+                    float(os.getenv("BCRYPT_TARGET_MS", 250)))
+            _service = HashingService(
+                workers=int(workers) if workers else None,
+                max_pending=int(max_pending) if max_pending else None,
+                rounds=rounds)
+    return _service
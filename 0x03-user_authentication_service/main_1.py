@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Concurrent logins against the Flask app, each thread posting to
+/sessions and reading /profile, on a throwaway SQLite database
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("DB_URL", "sqlite:///{}".format(
+    os.path.join(tempfile.mkdtemp(), "bench.db")))
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("DB_POOL_SIZE", "32")
+
+from app import AUTH, app  # noqa: E402
+
+logins = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+users = ["user{}@bench.io".format(i) for i in range(32)]
+for email in users:
+    AUTH.register_user(email, "pwd")
+AUTH.teardown()
+
+
+def run(threads: int) -> tuple:
+    """ Log in `logins` times over `threads` threads, return
+     (logins/sec, failed requests) """
+    failures = []
+
+    def work(i: int):
+        client = app.test_client()
+        email = users[i % len(users)]
+        for _ in range(logins // threads):
+            response = client.post("/sessions",
+                                   data={"email": email, "password": "pwd"})
+            if response.status_code != 200 \
+                    or client.get("/profile").status_code != 200:
+                failures.append(email)
+
+    workers = [threading.Thread(target=work, args=(i,))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (logins // threads) * threads / (time.perf_counter() - start), \
+        len(failures)
+
+
+for threads in (1, 4, 16, 32):
+    rate, failed = run(threads)
+    print("{:>2} threads: {:>8,.1f} logins/sec, {} failed".format(
+        threads, rate, failed))